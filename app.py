@@ -3,14 +3,20 @@ import streamlit.components.v1 as components
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime
-from pathlib import Path
 import os, sys
 import shutil
-import tempfile
 
+# pdf_report (reportlab/matplotlib/fpdf) dan graphic_report (altair) di-import saat
+# pertama dipakai agar cold start dashboard tidak membayar biaya import library report
 try:
-    from pdf_report import generate_pdf_report
-    import graphic_report
+    import data_access
+    import data_location
+    import data_store
+    import hotels
+    import ingest
+    import metrics
+    import report_cache
+    import report_jobs
 except ImportError as e:
     st.error(f"❌ Import error: {e}")
     st.stop()
@@ -29,60 +35,15 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-# ===========================
-# DATA DIRECTORY RESOLUTION
-# ===========================
-def _is_writable(dir_path: str) -> bool:
-    try:
-        os.makedirs(dir_path, exist_ok=True)
-        test_file = os.path.join(dir_path, ".write_test")
-        with open(test_file, "w") as f:
-            f.write("ok")
-        os.remove(test_file)
-        return True
-    except Exception:
-        return False
-
-def get_data_dir() -> str:
-    # Priority: fixed '/data' first (as requested)
-    fixed_dir = "/data"
-    if _is_writable(fixed_dir):
-        return fixed_dir
-    # Next: Streamlit secrets
-    try:
-        secrets_dir = st.secrets.get("DATA_DIR")  # type: ignore[attr-defined]
-        if secrets_dir and _is_writable(secrets_dir):
-            return secrets_dir
-    except Exception:
-        pass
-    # Next: Environment variable
-    env_dir = os.environ.get("DATA_DIR")
-    if env_dir and _is_writable(env_dir):
-        return env_dir
-    # Next: Streamlit Cloud persistent storage
-    mount_dir = "/mount/data"
-    if _is_writable(mount_dir):
-        return mount_dir
-    # Fallbacks
-    cwd_dir = os.path.join(os.getcwd(), "data")
-    if _is_writable(cwd_dir):
-        return cwd_dir
-    # User Documents/compbaru (local development fallback)
-    docs_dir = os.path.join(os.path.expanduser("~"), "Documents", "compbaru")
-    if _is_writable(docs_dir):
-        return docs_dir
-    # Temp directory (last resort)
-    tmp_dir = os.path.join(tempfile.gettempdir(), "compbaru")
-    os.makedirs(tmp_dir, exist_ok=True)
-    return tmp_dir
-
 # ===========================
 # CONFIG
 # ===========================
 logo_path = resource_path("Daun_logo.jpg")
-DATA_DIR = get_data_dir()
+# Folder data di-probe sekali per proses (lihat data_location.py), bukan di setiap rerun
+DATA_DIR = data_location.get_data_dir()
 file_path = os.path.join(DATA_DIR, "comparative_data.csv")
 capacity_path = os.path.join(DATA_DIR, 'room_capacity.csv')
+pdf_cache = report_cache.PdfArtifactCache(os.path.join(DATA_DIR, "report_cache"))
 
 def ensure_data_files(data_dir: str, comp_path: str, cap_path: str):
     os.makedirs(data_dir, exist_ok=True)
@@ -154,74 +115,21 @@ os.makedirs(os.path.dirname(file_path), exist_ok=True)
 required_cols = ['Date', 'Hotel', 'Room_Available', 'Room_Sold', 'ADR']
 
 # ===========================
-# Baca File CSV
-# ===========================
-if os.path.exists(file_path):
-    try:
-        # Check file size first
-        file_size = os.path.getsize(file_path)
-        
-        if file_size == 0:
-            st.warning("⚠️ File CSV kosong. Membuat struktur baru.")
-            df = pd.DataFrame(columns=required_cols)
-            df.to_csv(file_path, index=False)
-            st.success("✅ Struktur CSV berhasil dibuat.")
-        else:
-            df = pd.read_csv(file_path, parse_dates=['Date'])
-    except Exception as e:
-        st.error(f"❌ File CSV gagal dibaca: {type(e).__name__}: {str(e)}")
-        st.info("🔄 Mencoba membuat file baru...")
-        df = pd.DataFrame(columns=required_cols)
-        try:
-            df.to_csv(file_path, index=False)
-            st.success("✅ File comparative_data.csv baru berhasil dibuat.")
-        except Exception as write_err:
-            st.error(f"❌ Gagal menulis CSV: {write_err}")
-            st.error(f"❌ Path: {file_path}")
-            st.stop()
-else:
-    st.info("📝 File comparative_data.csv tidak ditemukan. Membuat file baru...")
-    df = pd.DataFrame(columns=required_cols)
-    try:
-        df.to_csv(file_path, index=False)
-        st.success("✅ File comparative_data.csv berhasil dibuat.")
-    except Exception as e:
-        st.error(f"❌ Gagal membuat file CSV: {e}")
-        st.error(f"❌ Path: {file_path}")
-        st.error(f"❌ Directory: {DATA_DIR}")
-        st.stop()
-
-# Pastikan semua kolom wajib ada
-for c in required_cols:
-    if c not in df.columns:
-        df[c] = None
-
-# Pastikan kolom tanggal valid
-df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-# Normalisasi nama hotel: trim dan rapikan spasi berlebih
-if 'Hotel' in df.columns:
-    df['Hotel'] = df['Hotel'].astype(str).apply(lambda x: ' '.join(x.split()))
-if df["Date"].isnull().all():
-    st.warning("⚠️ Tidak ada data tanggal valid di file CSV kamu. Pastikan kolom 'Date' berformat tanggal.")
-
-# ===========================
-# 🔄 Hitung Otomatis Room_Revenue
+# Baca Data dari Storage
 # ===========================
-# Konversi ke angka agar tidak error
-df["Room_Sold"] = pd.to_numeric(df.get("Room_Sold", 0), errors="coerce").fillna(0)
-df["ADR"] = pd.to_numeric(df.get("ADR", 0), errors="coerce").fillna(0)
-
-# Hitung otomatis Room_Revenue setiap kali file dibuka
-df["Room_Revenue"] = df["Room_Sold"] * df["ADR"]
-
-# (Opsional) Simpan hasil perhitungan ke file
+# Storage default: Parquet dipartisi per tahun/bulan (lihat data_store.py).
+# Room_Revenue dihitung di memori, tidak ada penulisan ulang file saat rerun.
 try:
-    df.to_csv(file_path, index=False)
-    # st.info("💾 Data berhasil diperbarui.")  # Comment out to reduce noise
+    store = data_access.get_store(DATA_DIR)
+    df = store.load()
 except Exception as e:
-    st.error(f"❌ Gagal menyimpan pembaruan ke CSV: {e}")
+    st.error(f"❌ Data gagal dibaca: {type(e).__name__}: {str(e)}")
+    st.error(f"❌ Directory: {DATA_DIR}")
     st.stop()
 
+if not df.empty and df["Date"].isnull().all():
+    st.warning("⚠️ Tidak ada data tanggal valid di file CSV kamu. Pastikan kolom 'Date' berformat tanggal.")
+
 # ===========================
 # ROOM CAPACITY REFERENCE
 # ===========================
@@ -234,7 +142,7 @@ if os.path.exists(capacity_path):
         if capacity_size == 0:
             st.warning("⚠️ room_capacity.csv kosong. Akan dibuat ulang.")
             raise FileNotFoundError("Empty file")
-        capacity_df = pd.read_csv(capacity_path)
+        capacity_df = data_store.read_csv_cached(capacity_path)
     except Exception as e:
         st.warning(f"⚠️ Gagal membaca room_capacity.csv: {e}. Membuat data sampel.")
         capacity_df = pd.DataFrame(columns=['Hotel', 'Room_Available'])
@@ -257,11 +165,14 @@ if 'capacity_df' not in locals() or capacity_df.empty:
         st.error(f"❌ Path: {capacity_path}")
         capacity_df = sample_capacity  # Use in-memory version
 
+# Dimensi hotel: nama kanonik (room_capacity.csv) + alias (hotel_aliases.csv)
+hotel_dim = hotels.load_dim(DATA_DIR, capacity_df)
+
 # Pastikan hotels_list selalu ada
 hotels_list = []
 
 if not df.empty and 'Hotel' in df.columns:
-    hotels_list = sorted(df['Hotel'].dropna().unique().tolist())
+    hotels_list = sorted(set(hotel_dim.resolve(df['Hotel'].dropna().unique())))
 elif not capacity_df.empty and 'Hotel' in capacity_df.columns:
     hotels_list = sorted(capacity_df['Hotel'].dropna().unique().tolist())
 else:
@@ -278,13 +189,13 @@ with st.sidebar.form('input_form'):
     input_date = st.date_input('Tanggal', datetime.now().date() - timedelta(days=1))
     input_hotel = st.selectbox('Nama Hotel', hotels_list)
 
-    # Ambil Room_Available dari referensi
-    default_capacity = capacity_df.loc[capacity_df['Hotel'] == input_hotel, 'Room_Available']
-    if not default_capacity.empty:
-        input_room_available = int(default_capacity.values[0])
+    # Ambil Room_Available dari referensi: kapasitas yang berlaku pada tanggal input
+    default_capacity = hotel_dim.capacity(input_hotel, input_date)
+    if default_capacity is not None:
+        input_room_available = default_capacity
     else:
         input_room_available = 0
-        st.warning(f"⚠️ Tidak ada Room_Available untuk {input_hotel} di room_capacity.csv")
+        st.warning(f"⚠️ Tidak ada Room_Available untuk {input_hotel} per {input_date} di room_capacity.csv")
 
     st.number_input('Room Available (dari referensi)', value=input_room_available, disabled=True)
     input_room_sold = st.number_input('Room Sold', min_value=0, value=0, step=1)
@@ -292,140 +203,141 @@ with st.sidebar.form('input_form'):
     submitted = st.form_submit_button('Tambah Data')
 
     if submitted:
-        # Normalisasi nama hotel untuk mencegah duplikasi karena spasi
-        new = pd.DataFrame({
-            'Date': [pd.Timestamp(input_date)],
-            'Hotel': [' '.join(str(input_hotel).split())],
-            'Room_Available': [input_room_available],
-            'Room_Sold': [int(input_room_sold)],
-            'ADR': [float(input_adr)]
+        # Upsert berdasarkan (Date, Hotel): input ulang malam yang sama akan menimpa, bukan duplikasi
+        status = store.upsert_row({
+            'Date': pd.Timestamp(input_date),
+            'Hotel': input_hotel,
+            'Room_Available': input_room_available,
+            'Room_Sold': int(input_room_sold),
+            'ADR': float(input_adr)
         })
-        df = pd.concat([df, new], ignore_index=True)
-        df.to_csv(file_path, index=False)
-        st.success(f'✅ Data untuk "{input_hotel}" berhasil disimpan dengan kapasitas otomatis {input_room_available} kamar.')
+        df = store.frame
+        if status == 'inserted':
+            st.success(f'✅ Data untuk "{input_hotel}" berhasil disimpan dengan kapasitas otomatis {input_room_available} kamar.')
+        elif status == 'updated':
+            st.success(f'✅ Data "{input_hotel}" tanggal {input_date} sudah ada dan berhasil diperbarui.')
+        else:
+            st.info(f'ℹ️ Data "{input_hotel}" tanggal {input_date} sudah sama, tidak ada perubahan.')
 
 
+# ===========================
+# KAPASITAS KAMAR (BERLAKU MULAI TANGGAL)
+# ===========================
+with st.sidebar.expander("🛏️ Kapasitas Kamar"):
+    st.caption("Renovasi / kamar out of order: catat kapasitas baru mulai tanggal tertentu. "
+               "Berlaku sampai perubahan berikutnya.")
+    st.dataframe(hotel_dim.capacity_intervals, hide_index=True)
+    with st.form('capacity_form'):
+        cap_hotel = st.selectbox('Hotel', hotel_dim.names or hotels_list)
+        cap_from = st.date_input('Berlaku mulai', datetime.now().date())
+        cap_rooms = st.number_input('Room Available', min_value=0, value=0, step=1)
+        if st.form_submit_button('Simpan Kapasitas'):
+            try:
+                hotels.add_capacity_change(capacity_path, cap_hotel, cap_from, cap_rooms)
+                st.success(f"✅ Kapasitas {cap_hotel} mulai {cap_from}: {cap_rooms} kamar. Refresh untuk memakai.")
+            except OSError as e:
+                st.error(f"❌ Gagal menulis room_capacity.csv: {e}")
+
 # ===========================
 # UPLOAD CSV / EXCEL
 # ===========================
 st.sidebar.write('---')
 st.sidebar.subheader("📤 Upload CSV/Excel")
 
-uploaded_file = st.sidebar.file_uploader("Pilih file CSV/Excel", type=['csv', 'xlsx'])
-if uploaded_file is not None:
+uploaded_files = st.sidebar.file_uploader("Pilih file CSV/Excel", type=['csv', 'xlsx'], accept_multiple_files=True)
+# File tetap ada di uploader antar rerun; proses sekali saja per kumpulan file
+upload_batch_id = tuple(f.file_id for f in uploaded_files or [])
+if upload_batch_id and st.session_state.get("ingested_upload") != upload_batch_id:
     try:
-        upload_dir = os.path.join(DATA_DIR, "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
+        # Satu folder per batch upload, nama file asli dipertahankan
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base, ext = os.path.splitext(uploaded_file.name)
-        safe_name = f"{base}_{ts}{ext}"
-        saved_path = os.path.join(upload_dir, safe_name)
-        with open(saved_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        st.sidebar.success(f"📂 Tersimpan otomatis: {saved_path}")
-
-        if ext.lower() == '.csv':
-            new_df = pd.read_csv(saved_path)
-        else:
-            new_df = pd.read_excel(saved_path)
-
-        missing = [c for c in required_cols if c not in new_df.columns]
-        if missing:
-            st.error(f"❌ Kolom wajib hilang pada file upload: {', '.join(missing)}")
-        else:
-            new_df['Date'] = pd.to_datetime(new_df['Date'], errors='coerce')
-            new_df['Room_Sold'] = pd.to_numeric(new_df.get('Room_Sold', 0), errors='coerce').fillna(0)
-            new_df['ADR'] = pd.to_numeric(new_df.get('ADR', 0), errors='coerce').fillna(0)
-            if 'Room_Revenue' not in new_df.columns:
-                new_df['Room_Revenue'] = new_df['Room_Sold'] * new_df['ADR']
-            # Normalisasi nama hotel untuk mencegah duplikasi karena spasi
-            if 'Hotel' in new_df.columns:
-                new_df['Hotel'] = new_df['Hotel'].astype(str).apply(lambda x: ' '.join(x.split()))
-
-            df = pd.concat([df, new_df], ignore_index=True)
-            df.to_csv(file_path, index=False)
-            st.success(f"✅ File '{uploaded_file.name}' berhasil diunggah, disimpan, dan digabung ke database.")
+        upload_dir = os.path.join(DATA_DIR, "uploads", ts)
+        os.makedirs(upload_dir, exist_ok=True)
+        saved_paths = []
+        for uploaded_file in uploaded_files:
+            saved_path = os.path.join(upload_dir, os.path.basename(uploaded_file.name))
+            with open(saved_path, "wb") as f:
+                shutil.copyfileobj(uploaded_file, f)
+            saved_paths.append(saved_path)
+        st.sidebar.success(f"📂 Tersimpan otomatis: {upload_dir}")
+
+        # Parse paralel per file (dibaca per chunk, divalidasi), lalu digabung dalam satu transaksi
+        progress = st.sidebar.progress(0.0, text="⏳ Memproses file...")
+        result, file_reports, rejected_rows = ingest.ingest_files(
+            store, saved_paths, hotel_dim=hotel_dim,
+            on_progress=lambda fraction, text: progress.progress(fraction, text=f"⏳ {text}")
+        )
+        progress.progress(1.0, text=f"✅ {len(saved_paths)} file diproses")
+        st.session_state["ingested_upload"] = upload_batch_id
+        st.session_state["upload_report"] = pd.DataFrame(file_reports)
+        st.session_state["upload_rejected"] = rejected_rows
+        df = store.frame
+        n_ok = sum(r['status'] == 'ok' for r in file_reports)
+        st.success(
+            f"✅ {n_ok}/{len(file_reports)} file berhasil digabung ke database: "
+            f"{result['inserted']} baru, {result['updated']} diperbarui, {result['unchanged']} tidak berubah."
+        )
     except Exception as e:
         st.error(f"❌ Gagal memproses file: {e}")
 
+if upload_batch_id and "upload_report" in st.session_state:
+    with st.sidebar.expander("📋 Laporan Upload", expanded=True):
+        st.dataframe(st.session_state["upload_report"], hide_index=True)
+        rejected_rows = st.session_state.get("upload_rejected")
+        if rejected_rows is not None and not rejected_rows.empty:
+            st.warning(f"⚠️ {len(rejected_rows):,} baris ditolak (tidak digabung ke database).")
+            st.dataframe(rejected_rows.head(100), hide_index=True)
+            st.download_button(
+                "⬇️ Unduh Baris Ditolak (CSV)",
+                data=rejected_rows.to_csv(index=False).encode("utf-8"),
+                file_name="rejected_rows.csv",
+                mime="text/csv"
+            )
+
 # ===========================
-# AGGREGATION & METRICS
-# ===========================
-def aggregate_period(df_all, up_to_date=None, period='last'):
-    if df_all.empty:
-        return pd.DataFrame()
-    df_all = df_all.copy()
-    df_all['Date'] = pd.to_datetime(df_all['Date'], errors='coerce')
-    # Normalisasi nama hotel kembali sebagai guardrail saat agregasi
-    if 'Hotel' in df_all.columns:
-        df_all['Hotel'] = df_all['Hotel'].astype(str).apply(lambda x: ' '.join(x.split()))
-    up_to = pd.Timestamp(up_to_date)
-
-    if period == 'last':
-        dfp = df_all[df_all['Date'] == up_to]
-    elif period == 'mtd':
-        dfp = df_all[(df_all['Date'].dt.month == up_to.month) &
-                     (df_all['Date'].dt.year == up_to.year) &
-                     (df_all['Date'] <= up_to)]
-    elif period == 'ytd':
-        dfp = df_all[(df_all['Date'].dt.year == up_to.year) &
-                     (df_all['Date'] <= up_to)]
-    else:
-        return pd.DataFrame()
-
-    if dfp.empty:
-        return pd.DataFrame()
-
-    grp = dfp.groupby('Hotel').agg({
-        'Room_Available': 'sum',
-        'Room_Sold': 'sum',
-        'ADR': lambda x: (x * dfp.loc[x.index, 'Room_Sold']).sum() / dfp.loc[x.index, 'Room_Sold'].sum() if dfp.loc[x.index, 'Room_Sold'].sum() > 0 else 0
-    }).reset_index()
-    grp['Revenue'] = grp['Room_Sold'] * grp['ADR']
-    return grp
-
-
-def compute_metrics_table(df_all, up_to_date, period):
-    agg = aggregate_period(df_all, up_to_date=up_to_date, period=period)
-    if agg.empty:
-        return pd.DataFrame()
-
-    agg['Occ%'] = agg.apply(lambda r: (r['Room_Sold'] / r['Room_Available'] * 100) if r['Room_Available'] > 0 else 0, axis=1)
-    agg['ARR'] = agg['ADR']
-    agg['RevPAR'] = agg.apply(lambda r: (r['Revenue'] / r['Room_Available']) if r['Room_Available'] > 0 else 0, axis=1)
-
-    total_available = agg['Room_Available'].sum()
-    total_sold = agg['Room_Sold'].sum()
-    total_revenue = agg['Revenue'].sum()
-    total_adr = total_revenue / total_sold if total_sold > 0 else 0
-    total_occ = total_sold / total_available * 100 if total_available > 0 else 0
-    total_revpar = total_revenue / total_available if total_available > 0 else 0
-
-    agg['RGI'] = agg['RevPAR'] / total_revpar * 100 if total_revpar > 0 else 0
-    agg['MPI'] = agg['Occ%'] / total_occ * 100 if total_occ > 0 else 0
-    agg['ARI'] = agg['ADR'] / total_adr * 100 if total_adr > 0 else 0
-    agg['Fair_Share'] = agg['Room_Available'] / total_available if total_available > 0 else 0
-    agg['Rank'] = agg['RevPAR'].rank(ascending=False, method='min').astype(int)
-
-    total_row = pd.DataFrame({
-        'Hotel': ['TOTAL'],
-        'Room_Available': [total_available],
-        'Room_Sold': [total_sold],
-        'ADR': [total_adr],
-        'Revenue': [total_revenue],
-        'Occ%': [total_occ],
-        'ARR': [total_adr],
-        'RevPAR': [total_revpar],
-        'RGI': [100],
-        'MPI': [100],
-        'ARI': [100],
-        'Fair_Share': [1],
-        'Rank': [None]
-    })
+# SAMAKAN NAMA HOTEL (ALIAS → KANONIK)
+# ===========================
+alias_renames = hotel_dim.rename_map(store.cube.hotels)
+if alias_renames:
+    st.sidebar.caption("🏨 Nama alias di data: " + ", ".join(f"{a} → {c}" for a, c in alias_renames.items()))
+    if st.sidebar.button("🏨 Samakan Nama Hotel"):
+        n_rows = store.rename_hotels(alias_renames)
+        df = store.frame
+        st.sidebar.success(f"✅ {n_rows} baris diganti ke nama kanonik.")
 
-    agg = pd.concat([agg, total_row], ignore_index=True)
-    agg = agg.sort_values(by=['Rank'], na_position='last')
-    return agg
+# ===========================
+# KOMPAKSI JOURNAL
+# ===========================
+journal_kb = store.journal_size() / 1024
+if journal_kb > 0:
+    st.sidebar.caption(f"🗒️ Journal belum dikompaksi: {journal_kb:,.1f} KB")
+    if st.sidebar.button("🗜️ Kompaksi Data"):
+        n_rows = store.compact()
+        st.sidebar.success(f"✅ {n_rows} baris journal digabung ke storage utama.")
+
+# ===========================
+# STATUS CACHE DATA
+# ===========================
+with st.sidebar.expander("⚙️ Cache Data"):
+    stats = data_store.cache_stats()
+    st.write(f"Dataset: {stats['dataset_hits']} hit / {stats['dataset_misses']} miss")
+    st.write(f"File referensi: {stats['file_hits']} hit / {stats['file_misses']} miss")
+    m_stats = metrics.metrics_cache.stats()
+    st.write(f"Tabel metrik: {m_stats['hits']} hit / {m_stats['misses']} miss ({m_stats['size']}/{m_stats['maxsize']} entri)")
+    st.write(f"Folder data: `{DATA_DIR}`")
+    if st.button("🩺 Cek Folder Data"):
+        health = data_location.health_check()
+        free = f", sisa {health['free_mb']:,.0f} MB" if health['free_mb'] is not None else ""
+        if health['writable']:
+            st.success(f"✅ Bisa ditulis ({health['source']}, probe {health['probe_ms']:.0f} ms{free})")
+        else:
+            st.error(f"❌ `{health['path']}` tidak bisa ditulis. Restart app untuk memilih folder lain.")
+    if st.button("📏 Jejak Memori Data"):
+        mem = data_store.memory_report(df)
+        total = mem.iloc[-1]
+        st.write(f"{len(df):,} baris: {total['Bytes_per_row']:.1f} byte/baris "
+                 f"(layout lama {total['Legacy_Bytes_per_row']:.1f} byte/baris)")
+        st.dataframe(mem, hide_index=True)
 
 # ===========================
 # PDF EXPORT SECTION
@@ -452,31 +364,37 @@ if not df.empty:
             max_value=max_date
         )
 
-        summary_data = {
-            "Last_Night": compute_metrics_table(df, selected_date, "last"),
-            "Month_to_Date": compute_metrics_table(df, selected_date, "mtd"),
-            "Year_to_Date": compute_metrics_table(df, selected_date, "ytd")
-        }
+        # Satu panggilan engine untuk ketiga periode; dipakai PDF dan tabel di bawah
+        summary_data = data_access.period_tables(selected_date, store)
 
         # ===========================
         # BUTTON GENERATE PDF
         # ===========================
         if st.button("📄 Generate PDF Report"):
             try:
-                pdf_buffer = generate_pdf_report(summary_data, pd.to_datetime(selected_date), logo_path=logo_path)
-
-                # Validasi PDF kosong
-                if pdf_buffer is None or pdf_buffer.getbuffer().nbytes == 0:
-                    st.error("⚠️ PDF kosong — kemungkinan ada error di proses generate.")
-                else:
-                    st.success("✅ PDF berhasil dibuat, silakan unduh di bawah ini.")
+                # PDF yang sama (tabel + tanggal + logo sama) diambil dari cache di DATA_DIR
+                cache_key = report_cache.artifact_key("comparative", summary_data, selected_date, logo_path)
+                pdf_file_name = f"CompSet_Report_{pd.to_datetime(selected_date).strftime('%Y%m%d')}.pdf"
+                pdf_bytes = pdf_cache.get(cache_key)
+                if pdf_bytes:
+                    st.success("✅ PDF diambil dari cache, silakan unduh di bawah ini.")
                     st.download_button(
                         label="⬇️ Download Report (PDF)",
-                        data=pdf_buffer,
-                        file_name=f"CompSet_Report_{pd.to_datetime(selected_date).strftime('%Y%m%d')}.pdf",
+                        data=pdf_bytes,
+                        file_name=pdf_file_name,
                         mime="application/pdf"
                     )
+                else:
+                    # Render di process pool agar halaman tetap responsif
+                    job_id = report_jobs.submit(
+                        "comparative", summary_data, pd.to_datetime(selected_date), logo_path,
+                        file_name=pdf_file_name, meta={"cache_key": cache_key}
+                    )
+                    st.session_state.setdefault("pdf_jobs", []).append(job_id)
+                    st.info("⏳ PDF sedang dibuat di background. Lihat status & link unduh di sidebar (🧾 PDF Jobs).")
 
+            except report_jobs.JobQueueFull as e:
+                st.warning(f"⚠️ {e}")
             except Exception as e:
                 st.error(f"❌ Terjadi error saat membuat PDF: {e}")
 
@@ -488,14 +406,33 @@ if not df.empty:
 # DISPLAY TABLES
 # ===========================
 if not df.empty:
-    periods = {'Last Night': 'last', 'Month To Date': 'mtd', 'Year To Date': 'ytd'}
-    for title, p in periods.items():
+    periods = {'Last Night': 'Last_Night', 'Month To Date': 'Month_to_Date', 'Year To Date': 'Year_to_Date'}
+    tables = {title: (metrics.PERIODS[key], summary_data[key]) for title, key in periods.items()}
+
+    # Periode tambahan (WTD, QTD, rolling, rentang custom): lookup prefix sum cube, tanpa filter ulang data
+    extra_periods = {key.replace('_', ' '): p for key, p in metrics.EXTRA_PERIODS.items()}
+    extra_titles = st.multiselect("➕ Tampilkan periode lain:", list(extra_periods) + ['Custom Range'])
+    for title in extra_titles:
+        if title != 'Custom Range':
+            tables[title] = (extra_periods[title], data_access.period_table(selected_date, extra_periods[title], store))
+            continue
+        custom_range = st.date_input("📆 Rentang custom:", value=(max(selected_date.replace(day=1), min_date), selected_date),
+                                     min_value=min_date, max_value=max_date)
+        if len(custom_range) == 2:
+            range_title = f"Custom {custom_range[0]:%d %b %Y} – {custom_range[1]:%d %b %Y}"
+            tables[range_title] = ('custom', data_access.range_table(*custom_range, store))
+
+    for title, (p, table_df) in tables.items():
         selected_date_ts = pd.to_datetime(selected_date)
         selected_date_str = selected_date_ts.strftime('%d %B %Y')  # contoh: 09 Oktober 2025
 
-        table_df = compute_metrics_table(df, selected_date_ts, p)
         st.markdown("<div class='bg-white rounded-xl border border-emerald-200 shadow-sm p-4 md:p-6 mb-6'>", unsafe_allow_html=True)
-        st.markdown(f"<h3 class='text-lg font-semibold text-emerald-800 mb-3'>{title} — {selected_date_str}</h3>", unsafe_allow_html=True)
+        heading = title if p == 'custom' else f"{title} — {selected_date_str}"
+        st.markdown(f"<h3 class='text-lg font-semibold text-emerald-800 mb-3'>{heading}</h3>", unsafe_allow_html=True)
+        if table_df.empty:
+            st.info("Tidak ada data untuk periode ini.")
+            st.markdown("</div>", unsafe_allow_html=True)
+            continue
 
 
         table_df_formatted = table_df.copy()
@@ -540,7 +477,7 @@ if not df.empty:
 st.markdown("<div class='bg-white rounded-xl border border-emerald-200 shadow-sm p-4 md:p-6 mb-6'>", unsafe_allow_html=True)
 st.markdown("<h3 class='text-lg font-semibold text-emerald-800 mb-3'>📋 Database (Raw Data)</h3>", unsafe_allow_html=True)
 st.dataframe(df.sort_values('Date', ascending=False))
-csv_data = df.to_csv(index=False).encode('utf-8')
+csv_data = store.export_csv(df)
 st.download_button(label='💾 Unduh Data CSV', data=csv_data, file_name='comparative_data.csv', mime='text/csv')
 st.caption('Dashboard modern dengan baris TOTAL, Rank, dan highlight RevPAR tertinggi.')
 st.markdown("</div>", unsafe_allow_html=True)
@@ -553,7 +490,7 @@ st.markdown("<h3 class='text-lg font-semibold text-emerald-800 mb-3'>✏️ Edit
 
 if not df.empty:
     df_sorted = df.sort_values("Date", ascending=False)
-    df_sorted["Display"] = df_sorted.apply(lambda x: f"{x['Date'].strftime('%d %b %Y')} — {x['Hotel']}", axis=1)
+    df_sorted["Display"] = df_sorted["Date"].dt.strftime('%d %b %Y') + " — " + df_sorted["Hotel"].astype(str)
     selected_row = st.selectbox("Pilih data yang ingin diedit:", df_sorted["Display"].tolist())
 
     if selected_row:
@@ -567,19 +504,22 @@ if not df.empty:
         col1, col2 = st.columns(2)
         with col1:
             if st.button("💾 Simpan Perubahan"):
-                idx = df_sorted[df_sorted["Display"] == selected_row].index[0]
-                df.loc[idx, "Date"] = pd.Timestamp(edit_date)
-                df.loc[idx, "Hotel"] = edit_hotel
-                df.loc[idx, "Room_Available"] = edit_room_available
-                df.loc[idx, "Room_Sold"] = edit_room_sold
-                df.loc[idx, "ADR"] = edit_adr
-                df.to_csv(file_path, index=False)
+                # Alias yang diketik disimpan dengan nama kanoniknya
+                edit_hotel = hotel_dim.resolve([edit_hotel]).iloc[0]
+                # Key (Date, Hotel) berubah: hapus baris lama, lalu upsert baris baru
+                if data_store.row_key(edit_date, edit_hotel) != data_store.row_key(row_data["Date"], row_data["Hotel"]):
+                    store.delete(row_data["Date"], row_data["Hotel"])
+                store.upsert_row({
+                    "Date": pd.Timestamp(edit_date),
+                    "Hotel": edit_hotel,
+                    "Room_Available": edit_room_available,
+                    "Room_Sold": edit_room_sold,
+                    "ADR": edit_adr
+                })
                 st.success("✅ Data berhasil diperbarui. Silakan refresh halaman untuk melihat hasil.")
         with col2:
             if st.button("🗑️ Hapus Data"):
-                idx = df_sorted[df_sorted["Display"] == selected_row].index[0]
-                df.drop(index=idx, inplace=True)
-                df.to_csv(file_path, index=False)
+                store.delete(row_data["Date"], row_data["Hotel"])
                 st.warning("⚠️ Data telah dihapus. Silakan refresh halaman.")
 else:
     st.info("Belum ada data untuk diedit.")
@@ -606,33 +546,22 @@ def render_pdf_button(summary, show_pdf_button=True):
     # Tombol di sidebar (lebih rapi)
     if st.sidebar.button("📄 Generate Graphic PDF Report"):
         try:
-            # Tentukan folder output
-            output_folder = os.path.expanduser("~/Documents/compbaru")
-            os.makedirs(output_folder, exist_ok=True)
-
-            # Buat nama file unik
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pdf_filename = f"graphic_report_{timestamp}.pdf"
-            pdf_path = os.path.join(output_folder, pdf_filename)
+            from pdf_report import generate_graphic_pdf
 
-            # Buat PDF menggunakan fungsi dari pdf_report.py
-            pdf_result = generate_graphic_pdf(summary)
+            # Render langsung ke buffer di memori (tanpa file di disk)
+            pdf_buffer = generate_graphic_pdf(summary)
 
-            if pdf_result and os.path.exists(pdf_result):
+            if pdf_buffer is not None:
                 st.sidebar.success("✅ PDF report generated successfully!")
-                st.sidebar.write(f"📂 Saved at: `{pdf_result}`")
-
-                # Tombol download
-                with open(pdf_result, "rb") as f:
+                with pdf_buffer:
                     st.sidebar.download_button(
                         label="⬇️ Download PDF Report",
-                        data=f,
-                        file_name=Path(pdf_result).name,
+                        data=pdf_buffer.read(),
+                        file_name=f"graphic_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
                         mime="application/pdf"
                     )
             else:
                 st.sidebar.error("❌ Failed to generate PDF report. Check console for details.")
-
         except Exception as e:
             st.sidebar.error(f"⚠️ Error generating PDF: {e}")
 
@@ -650,12 +579,48 @@ st.sidebar.markdown("<div class='border-b border-emerald-300 my-2'></div>", unsa
 
 if nav == "Graphic Report":
     try:
+        import graphic_report
         graphic_report.generate_graphic_report(show_pdf_button=True)
     except Exception as e:
         st.error("❌ Terjadi error di halaman Graphic Report.")
         st.exception(e)
 
 
+# ===========================
+# STATUS JOB PDF (BACKGROUND)
+# ===========================
+def render_pdf_jobs():
+    """Daftar job PDF milik session ini: status, durasi, dan tombol unduh bila selesai."""
+    job_ids = st.session_state.get("pdf_jobs", [])
+    jobs = [job for job in (report_jobs.get(job_id) for job_id in reversed(job_ids)) if job is not None]
+    if not jobs:
+        return
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("🧾 PDF Jobs")
+    st.sidebar.button("🔄 Refresh Status")
+    for job in jobs:
+        status = job.status
+        if status == "done":
+            pdf_bytes = job.result()
+            cache_key = job.meta.get("cache_key")
+            if cache_key and not job.meta.get("cached"):
+                pdf_cache.put(cache_key, pdf_bytes)
+                job.meta["cached"] = True
+            st.sidebar.download_button(
+                label=f"⬇️ {job.file_name} ({job.elapsed:.0f}s)",
+                data=pdf_bytes,
+                file_name=job.file_name,
+                mime="application/pdf",
+                key=f"pdf_job_{job.id}"
+            )
+        elif status == "failed":
+            st.sidebar.error(f"❌ {job.file_name}: {job.error}")
+        else:
+            label = "menunggu antrian" if status == "queued" else "sedang dibuat"
+            st.sidebar.info(f"⏳ {job.file_name}: {label} ({job.elapsed:.0f}s)")
+
+
+render_pdf_jobs()
 
 # -----------------------------------------------
 # TOMBOL UNTUK GRAPHIC REPORT
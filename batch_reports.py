@@ -0,0 +1,126 @@
+# =========================================================
+# batch_reports.py — Generate PDF report untuk banyak tanggal (headless)
+# =========================================================
+# Contoh:
+#   python batch_reports.py --data-dir /mount/data --start 2025-01-01 --end 2025-10-31 --month-ends --out reports/
+#   python batch_reports.py --data-dir ./data --start 2025-10-01 --end 2025-10-07 --kind both --workers 4
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import data_location
+import data_store
+import metrics
+from report_jobs import RENDERERS
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Daun_logo.jpg")
+FILE_NAMES = {
+    'comparative': "CompSet_Report_{:%Y%m%d}.pdf",
+    'graphic': "graphic_report_{:%Y%m%d}.pdf",
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate CompSet PDF reports untuk rentang tanggal.")
+    parser.add_argument("--data-dir", default=None,
+                        help="Folder data (default: sama dengan app — /data, env DATA_DIR, /mount/data, ./data, ...)")
+    parser.add_argument("--start", required=True, help="Tanggal awal (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, help="Tanggal akhir (YYYY-MM-DD)")
+    parser.add_argument("--month-ends", action="store_true", help="Hanya tanggal akhir bulan di rentang")
+    parser.add_argument("--kind", choices=["comparative", "graphic", "both"], default="comparative")
+    parser.add_argument("--out", default="reports", help="Folder output PDF + manifest.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Jumlah proses render")
+    args = parser.parse_args(argv)
+    args.data_dir = args.data_dir or data_location.get_data_dir()
+    return args
+
+
+def report_dates(start, end, month_ends=False):
+    dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+    return dates[dates.is_month_end] if month_ends else dates
+
+
+def summaries_by_date(store, dates):
+    """Metrik Last Night / MTD / YTD untuk semua tanggal dalam satu pass vectorized per periode."""
+    per_period = {name: metrics.compute_metrics_batch(store.cube, dates, p) for name, p in metrics.PERIODS.items()}
+    grouped = {name: dict(tuple(table.groupby("Date"))) if not table.empty else {}
+               for name, table in per_period.items()}
+    result = {}
+    for day in dates:
+        summary = {}
+        for name in metrics.PERIODS:
+            table = grouped[name].get(day)
+            summary[name] = table.drop(columns="Date") if table is not None else pd.DataFrame()
+        result[day] = summary
+    return result
+
+
+def _has_data(kind, summary):
+    # Laporan grafik hanya memakai Last Night; comparative cukup salah satu periode terisi
+    if kind == 'graphic':
+        return not summary['Last_Night'].empty
+    return not all(table.empty for table in summary.values())
+
+
+def _render_job(kind, summary, day):
+    if kind == 'comparative':
+        return RENDERERS['comparative'](summary, day, LOGO_PATH)
+    # Paralel antar laporan; halaman di dalam satu laporan dirender berurutan di worker itu
+    return RENDERERS['graphic'](metrics.graphic_summary(summary['Last_Night']), day, LOGO_PATH)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+    kinds = ['comparative', 'graphic'] if args.kind == 'both' else [args.kind]
+
+    store = data_store.open_store(args.data_dir)
+    store.load()
+    dates = report_dates(args.start, args.end, args.month_ends)
+    print(f"📅 {len(dates)} tanggal, {len(kinds)} jenis laporan, {args.workers} worker")
+
+    t0 = time.perf_counter()
+    summaries = summaries_by_date(store, dates)
+    print(f"📊 Metrik dihitung dalam {time.perf_counter() - t0:.2f}s")
+
+    manifest = []
+    with ProcessPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+        futures = {}
+        for day, summary in summaries.items():
+            for kind in kinds:
+                file_name = FILE_NAMES[kind].format(day)
+                if not _has_data(kind, summary):
+                    manifest.append({'date': day.date(), 'kind': kind, 'file': file_name, 'status': 'skipped',
+                                     'error': 'tidak ada data', 'bytes': 0, 'sha256': '', 'seconds': 0.0})
+                    continue
+                futures[pool.submit(_render_job, kind, summary, day)] = (day, kind, file_name, time.perf_counter())
+        for future in as_completed(futures):
+            day, kind, file_name, started = futures[future]
+            entry = {'date': day.date(), 'kind': kind, 'file': file_name, 'status': 'ok', 'error': '',
+                     'bytes': 0, 'sha256': '', 'seconds': 0.0}
+            try:
+                data = future.result()
+                with open(os.path.join(args.out, file_name), "wb") as f:
+                    f.write(data)
+                entry.update(bytes=len(data), sha256=hashlib.sha256(data).hexdigest())
+            except Exception as e:
+                entry.update(status='failed', error=f"{type(e).__name__}: {e}")
+            entry['seconds'] = round(time.perf_counter() - started, 2)
+            manifest.append(entry)
+            print(f"{'✅' if entry['status'] == 'ok' else '❌'} {file_name} {entry['error']}")
+
+    manifest_df = pd.DataFrame(manifest).sort_values(['date', 'kind'])
+    manifest_path = os.path.join(args.out, "manifest.csv")
+    manifest_df.to_csv(manifest_path, index=False)
+    failed = int((manifest_df['status'] == 'failed').sum())
+    print(f"📄 Manifest: {manifest_path} ({len(manifest_df)} entri, {failed} gagal) — {time.perf_counter() - t0:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# =========================================================
+# bench_startup.py — Ukur waktu import & cold start app.py
+# =========================================================
+# Contoh:
+#   python bench_startup.py --label before
+#   python bench_startup.py --label after --runs 5
+# Hasil dicetak dan ditambahkan ke bench_output.txt.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+OUTPUT = os.path.join(ROOT, "bench_output.txt")
+
+# Modul yang diukur sendiri-sendiri (cold import di proses baru)
+MODULES = [
+    "streamlit", "pandas", "plotly.graph_objects", "altair",
+    "matplotlib.pyplot", "reportlab.platypus", "fpdf",
+    "pdf_report", "graphic_report", "data_store", "metrics",
+]
+# Library berat yang idealnya TIDAK ter-load saat dashboard pertama kali dibuka
+HEAVY = ["pdf_report", "graphic_report", "altair", "matplotlib", "reportlab", "fpdf"]
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+APP_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+t = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=300).run()
+elapsed = time.perf_counter() - t
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed)
+print(",".join(loaded))
+print(len(at.exception))
+"""
+
+
+def _run(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()
+
+
+def bench_imports(runs):
+    results = {}
+    for module in MODULES:
+        times = [float(_run(IMPORT_SNIPPET.format(root=ROOT, module=module))[-1]) for _ in range(runs)]
+        results[module] = statistics.median(times)
+    return results
+
+
+def bench_app(runs):
+    times, loaded, errors = [], "", 0
+    for _ in range(runs):
+        lines = _run(APP_SNIPPET.format(root=ROOT, app=os.path.join(ROOT, "app.py"), heavy=HEAVY))
+        times.append(float(lines[-3]))
+        loaded, errors = lines[-2], int(lines[-1])
+    return statistics.median(times), loaded, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark waktu import & cold start app.py")
+    parser.add_argument("--label", default="", help="Label hasil (mis. before / after)")
+    parser.add_argument("--runs", type=int, default=3, help="Jumlah pengulangan (diambil median)")
+    args = parser.parse_args(argv)
+
+    lines = [f"== {datetime.now():%Y-%m-%d %H:%M:%S} {args.label} (median dari {args.runs} run) =="]
+    for module, seconds in bench_imports(args.runs).items():
+        lines.append(f"import {module:<22} {seconds * 1000:8.0f} ms")
+    app_seconds, loaded, errors = bench_app(args.runs)
+    lines.append(f"app.py first run (dashboard)   {app_seconds * 1000:8.0f} ms")
+    lines.append(f"heavy modules loaded           {loaded or '-'}")
+    if errors:
+        lines.append(f"app exceptions                 {errors}")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT, "a") as f:
+        f.write(report + "\n\n")
+
+
+if __name__ == "__main__":
+    main()
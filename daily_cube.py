@@ -0,0 +1,185 @@
+# =========================================================
+# daily_cube.py — Cube harian Date × Hotel dengan prefix sum
+# =========================================================
+import numpy as np
+import pandas as pd
+
+# Measure yang disimpan per sel; 'Rows' menandai hotel punya data di malam itu
+MEASURES = ['Room_Available', 'Room_Sold', 'Revenue', 'Rows']
+
+
+def rolling_days(period):
+    """Panjang window untuk period rolling 'r<N>' (mis. 'r28' = 28 malam terakhir); None bila bukan rolling."""
+    if isinstance(period, str) and period[:1] == 'r' and period[1:].isdigit() and int(period[1:]) > 0:
+        return int(period[1:])
+    return None
+
+
+def period_bounds(up_to_date, period):
+    """
+    Rentang [start, end] untuk period 'last' / 'wtd' (mulai Senin) / 'mtd' / 'qtd' / 'ytd'
+    atau rolling 'r<N>'. None bila period tidak dikenal.
+    """
+    up_to = pd.Timestamp(up_to_date).normalize()
+    start = period_starts([up_to], period)
+    if start is None:
+        return None
+    return start[0], up_to
+
+
+def period_starts(ends, period):
+    """Versi vectorized period_bounds: tanggal awal periode untuk banyak tanggal akhir sekaligus."""
+    ends = pd.DatetimeIndex(ends).normalize()
+    if period == 'last':
+        return ends
+    if period == 'wtd':
+        return ends - pd.to_timedelta(ends.dayofweek, unit='D')
+    if period == 'mtd':
+        return ends - pd.to_timedelta(ends.day - 1, unit='D')
+    if period == 'qtd':
+        return ends.to_period('Q').start_time
+    if period == 'ytd':
+        return ends - pd.to_timedelta(ends.dayofyear - 1, unit='D')
+    days = rolling_days(period)
+    if days is not None:
+        return ends - pd.Timedelta(days=days - 1)
+    return None
+
+
+class DailyCube:
+    """
+    Matriks Date × Hotel untuk Room_Available, Room_Sold dan Revenue, plus prefix sum
+    kumulatif sepanjang tanggal. Total rentang apa pun (last night, MTD, YTD, custom)
+    = cum[end] - cum[start - 1], sehingga biayanya O(jumlah hotel), bukan O(jumlah baris).
+    """
+
+    def __init__(self, df):
+        df = df[df['Date'].notna()]
+        dates = df['Date'].dt.normalize()
+        if df.empty:
+            self.start = pd.Timestamp.today().normalize()
+            self.dates = pd.DatetimeIndex([])
+            self.hotels = []
+        else:
+            self.start = dates.min()
+            self.dates = pd.date_range(self.start, dates.max(), freq='D')
+            self.hotels = sorted(df['Hotel'].unique().tolist())
+        self._hotel_pos = {h: i for i, h in enumerate(self.hotels)}
+        self._values = np.zeros((len(MEASURES), len(self.dates), len(self.hotels)))
+        if not df.empty:
+            d_idx = (dates - self.start).dt.days.to_numpy()
+            h_idx = pd.Index(self.hotels).get_indexer(df['Hotel'])
+            for m, vals in enumerate(self._measure_arrays(df)):
+                np.add.at(self._values[m], (d_idx, h_idx), vals)
+        self._cum = self._values.cumsum(axis=1)
+
+    @staticmethod
+    def _measure_arrays(df):
+        return [
+            df['Room_Available'].to_numpy(dtype='float64'),
+            df['Room_Sold'].to_numpy(dtype='float64'),
+            (df['Room_Sold'] * df['ADR']).to_numpy(dtype='float64'),
+            np.ones(len(df)),
+        ]
+
+    # ---------------------------
+    # Update inkremental
+    # ---------------------------
+    def _grow(self, dates, hotels):
+        """Perluas cube bila ada tanggal di luar rentang atau hotel baru."""
+        new_hotels = sorted(set(self.hotels) | set(hotels))
+        lo = min([self.start] + list(dates)) if len(self.dates) else min(dates)
+        hi = max([self.dates[-1]] + list(dates)) if len(self.dates) else max(dates)
+        if new_hotels == self.hotels and len(self.dates) and lo >= self.start and hi <= self.dates[-1]:
+            return
+        new_dates = pd.date_range(lo, hi, freq='D')
+        values = np.zeros((len(MEASURES), len(new_dates), len(new_hotels)))
+        if len(self.dates) and self.hotels:
+            offset = (self.start - lo).days
+            cols = [new_hotels.index(h) for h in self.hotels]
+            values[:, offset:offset + len(self.dates), cols] = self._values
+        self.start, self.dates, self.hotels = lo, new_dates, new_hotels
+        self._hotel_pos = {h: i for i, h in enumerate(self.hotels)}
+        self._values = values
+        self._cum = values.cumsum(axis=1)
+
+    def _set_cells(self, d_idx, h_idx, new_values):
+        delta = new_values - self._values[:, d_idx, h_idx]
+        self._values[:, d_idx, h_idx] = new_values
+        if len(d_idx) == 1:
+            # Satu sel: cukup geser prefix sum dari tanggal itu ke depan (kolom hotel itu saja)
+            self._cum[:, d_idx[0]:, h_idx[0]] += delta[:, 0][:, None]
+        else:
+            self._cum = self._values.cumsum(axis=1)
+
+    def upsert(self, rows):
+        """Timpa sel (Date, Hotel) dengan nilai baris baru (rows sudah bersih & unik per key)."""
+        rows = rows[rows['Date'].notna()]
+        if rows.empty:
+            return
+        dates = rows['Date'].dt.normalize()
+        self._grow(dates.tolist(), rows['Hotel'].tolist())
+        d_idx = (dates - self.start).dt.days.to_numpy()
+        h_idx = pd.Index(self.hotels).get_indexer(rows['Hotel'])
+        self._set_cells(d_idx, h_idx, np.vstack(self._measure_arrays(rows)))
+
+    def delete(self, date, hotel):
+        date = pd.Timestamp(date).normalize()
+        pos = self._hotel_pos.get(hotel)
+        if pos is None or not len(self.dates) or not (self.start <= date <= self.dates[-1]):
+            return
+        d = (date - self.start).days
+        self._set_cells(np.array([d]), np.array([pos]), np.zeros((len(MEASURES), 1)))
+
+    # ---------------------------
+    # Query
+    # ---------------------------
+    def range_totals(self, start, end):
+        """Total per hotel untuk rentang [start, end]; hanya hotel yang punya data di rentang itu."""
+        empty = pd.DataFrame()
+        if not len(self.dates):
+            return empty
+        start = max(pd.Timestamp(start).normalize(), self.start)
+        end = min(pd.Timestamp(end).normalize(), self.dates[-1])
+        if start > end:
+            return empty
+        i = (start - self.start).days
+        j = (end - self.start).days
+        totals = self._cum[:, j, :] - (self._cum[:, i - 1, :] if i > 0 else 0)
+        present = totals[MEASURES.index('Rows')] > 0
+        if not present.any():
+            return empty
+        available, sold, revenue = (totals[MEASURES.index(m)][present] for m in ['Room_Available', 'Room_Sold', 'Revenue'])
+        adr = np.divide(revenue, sold, out=np.zeros_like(revenue), where=sold > 0)
+        return pd.DataFrame({
+            'Hotel': np.array(self.hotels, dtype=object)[present],
+            'Room_Available': np.rint(available).astype('int64'),
+            'Room_Sold': np.rint(sold).astype('int64'),
+            'ADR': adr,
+            'Revenue': np.where(sold > 0, revenue, 0.0),
+        })
+
+    def batch_range_totals(self, starts, ends):
+        """
+        Total per (tanggal, hotel) untuk banyak rentang sekaligus.
+        Return array (len(MEASURES), len(ends), len(hotels)).
+        """
+        starts = pd.DatetimeIndex(starts).normalize()
+        ends = pd.DatetimeIndex(ends).normalize()
+        out = np.zeros((len(MEASURES), len(ends), len(self.hotels)))
+        if not len(self.dates) or not len(ends):
+            return out
+        i = np.asarray((starts - self.start).days)
+        j = np.asarray((ends - self.start).days)
+        i = np.clip(i, 0, len(self.dates) - 1)
+        valid = (i <= j) & (j >= 0) & (np.asarray((starts - self.dates[-1]).days) <= 0)
+        j = np.clip(j, 0, len(self.dates) - 1)
+        before = np.where((i > 0)[None, :, None], self._cum[:, np.maximum(i - 1, 0), :], 0.0)
+        out[:, valid, :] = (self._cum[:, j, :] - before)[:, valid, :]
+        return out
+
+    def period_totals(self, up_to_date, period):
+        bounds = period_bounds(up_to_date, period)
+        if bounds is None:
+            return pd.DataFrame()
+        return self.range_totals(*bounds)
@@ -0,0 +1,76 @@
+# =========================================================
+# data_access.py — Satu pintu data untuk Dashboard & Graphic Report
+# =========================================================
+# Halaman tidak membaca file atau menghitung metrik sendiri. Semua lewat sini:
+# folder data (data_location), DataStore bersama + DailyCube (data_store) dan
+# tabel metrik ber-cache (metrics). Dua halaman = angka yang sama, satu kali baca disk.
+import pandas as pd
+
+import data_location
+import data_store
+import metrics
+
+
+def get_store(data_dir=None):
+    """DataStore bersama untuk folder data aplikasi (di-cache per proses oleh data_store)."""
+    return data_store.open_store(data_dir or data_location.get_data_dir())
+
+
+def date_bounds(store=None):
+    """(tanggal pertama, tanggal terakhir) yang punya data, atau None bila kosong."""
+    cube = (store or get_store()).cube
+    if not len(cube.dates):
+        return None
+    return cube.start.date(), cube.dates[-1].date()
+
+
+def period_tables(up_to_date, store=None):
+    """Tabel metrik Last Night / MTD / YTD (kunci = metrics.PERIODS)."""
+    store = store or get_store()
+    df = store.load()
+    return metrics.compute_all_periods(df, up_to_date, cube=store.cube, data_version=store.version)
+
+
+def graphic_summary(up_to_date, store=None):
+    """Ringkasan per hotel (Last Night) untuk halaman & PDF grafik; ADR tertimbang Room_Sold."""
+    return metrics.graphic_summary(period_tables(pd.Timestamp(up_to_date), store)['Last_Night'])
+
+
+def _cached_table(store, key, build):
+    # Kunci diawali data_version: tabel lama otomatis tidak terpakai setelah data berubah
+    key = (store.version,) + key
+    table = metrics.metrics_cache.get(key)
+    if table is None:
+        table = build()
+        metrics.metrics_cache.put(key, table)
+    return table
+
+
+def period_table(up_to_date, period, store=None):
+    """Tabel metrik satu period (kode daily_cube, mis. 'wtd', 'qtd', 'r28'), dari prefix sum cube."""
+    store = store or get_store()
+    df = store.load()
+    day = pd.Timestamp(up_to_date).normalize()
+    return _cached_table(store, (day, period),
+                         lambda: metrics.compute_metrics_table(df, day, period, cube=store.cube))
+
+
+def range_table(start, end, store=None):
+    """Tabel metrik untuk rentang tanggal custom [start, end]."""
+    store = store or get_store()
+    df = store.load()
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    return _cached_table(store, (start, end, 'range'),
+                         lambda: metrics.compute_range_table(df, start, end, cube=store.cube))
+
+
+def metric_trend(end_date, period, metric='RGI', days=365, store=None):
+    """Deret `metric` per hotel untuk `days` tanggal terakhir s/d end_date (mis. RGI rolling 28 malam)."""
+    store = store or get_store()
+    store.load()
+    cube = store.cube
+    if not len(cube.dates):
+        return pd.DataFrame()
+    end = pd.Timestamp(end_date).normalize()
+    start = max(end - pd.Timedelta(days=days - 1), cube.start)
+    return metrics.metric_trend(cube, pd.date_range(start, end, freq='D'), period, metric)
@@ -0,0 +1,90 @@
+# =========================================================
+# data_location.py — Resolusi folder data (sekali per proses)
+# =========================================================
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+
+_lock = threading.Lock()
+_resolved = None  # (path, source, resolved_at)
+
+
+def _is_writable(dir_path: str) -> bool:
+    try:
+        os.makedirs(dir_path, exist_ok=True)
+        test_file = os.path.join(dir_path, ".write_test")
+        with open(test_file, "w") as f:
+            f.write("ok")
+        os.remove(test_file)
+        return True
+    except Exception:
+        return False
+
+
+def _secrets_dir():
+    # Hanya bila streamlit sudah di-load (app); CLI tidak perlu membayar import streamlit
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return None
+    try:
+        return st.secrets.get("DATA_DIR")  # type: ignore[attr-defined]
+    except Exception:
+        return None
+
+
+def _candidates():
+    """Urutan prioritas folder data: (source, path)."""
+    yield "fixed", "/data"
+    yield "secrets", _secrets_dir()
+    yield "env", os.environ.get("DATA_DIR")
+    # Streamlit Cloud persistent storage
+    yield "mount", "/mount/data"
+    yield "cwd", os.path.join(os.getcwd(), "data")
+    # User Documents/compbaru (local development fallback)
+    yield "documents", os.path.join(os.path.expanduser("~"), "Documents", "compbaru")
+
+
+def _resolve():
+    for source, path in _candidates():
+        if path and _is_writable(path):
+            return path, source
+    # Temp directory (last resort)
+    tmp_dir = os.path.join(tempfile.gettempdir(), "compbaru")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return tmp_dir, "tmp"
+
+
+def get_data_dir(refresh=False) -> str:
+    """Folder data yang bisa ditulis. Di-probe sekali per proses; refresh=True untuk probe ulang."""
+    global _resolved
+    with _lock:
+        if _resolved is None or refresh:
+            path, source = _resolve()
+            _resolved = (path, source, time.time())
+        return _resolved[0]
+
+
+def health_check() -> dict:
+    """Cek ulang folder data yang sedang dipakai: masih ada, bisa ditulis, sisa ruang disk."""
+    path = get_data_dir()
+    _, source, resolved_at = _resolved
+    status = {
+        "path": path,
+        "source": source,
+        "resolved_at": resolved_at,
+        "exists": os.path.isdir(path),
+        "writable": False,
+        "free_mb": None,
+        "probe_ms": None,
+    }
+    t = time.perf_counter()
+    status["writable"] = _is_writable(path)
+    status["probe_ms"] = (time.perf_counter() - t) * 1000
+    try:
+        status["free_mb"] = shutil.disk_usage(path).free / (1024 * 1024)
+    except OSError:
+        pass
+    return status
@@ -0,0 +1,781 @@
+# =========================================================
+# data_store.py — Storage layer untuk comparative_data
+# =========================================================
+import os
+import glob
+import shutil
+import itertools
+import threading
+import numpy as np
+import pandas as pd
+
+from daily_cube import DailyCube
+
+COLUMNS = ['Date', 'Hotel', 'Room_Available', 'Room_Sold', 'ADR', 'Room_Revenue']
+REQUIRED_COLUMNS = ['Date', 'Hotel', 'Room_Available', 'Room_Sold', 'ADR']
+
+# Primary key: satu baris per hotel per malam
+KEY = ['Date', 'Hotel']
+VALUE_COLUMNS = ['Room_Available', 'Room_Sold', 'ADR']
+
+# Skema kompak di memori. Hotel disimpan sebagai category (kode int8/int16 + satu
+# salinan nama per hotel), jumlah kamar int32. Date tetap datetime64 (pandas tidak
+# punya resolusi harian) agar filter tanggal & .dt di semua halaman tetap jalan.
+SCHEMA = {
+    'Date': 'datetime64[ns]',
+    'Hotel': 'category',
+    'Room_Available': 'int32',
+    'Room_Sold': 'int32',
+    'ADR': 'float64',
+    'Room_Revenue': 'float64',
+}
+# Layout sebelum skema kompak (nama hotel sebagai string Python, angka 64-bit); untuk memory_report
+LEGACY_SCHEMA = dict(SCHEMA, Hotel=object, Room_Available='int64', Room_Sold='int64')
+
+# Partisi untuk baris dengan tanggal tidak valid (NaT)
+UNDATED = (0, 0)
+
+# Journal dikompaksi otomatis ke storage utama setelah melewati ukuran ini
+JOURNAL_COMPACT_BYTES = 1_000_000
+# Baris per potongan saat hasil merge massal ditulis ke journal staging
+WRITE_CHUNK_ROWS = 50_000
+
+# Satu writer per proses (semua session Streamlit berbagi proses yang sama);
+# lock yang sama menjaga cache dataset bersama
+_WRITE_LOCK = threading.RLock()
+
+# Cache level proses: DataStore per data_dir dan file CSV kecil (room_capacity.csv)
+_STORES = {}
+_FILE_CACHE = {}
+_CACHE_STATS = {'dataset_hits': 0, 'dataset_misses': 0, 'file_hits': 0, 'file_misses': 0}
+
+# Nomor versi data, unik lintas store; naik setiap kali isi data berubah
+_VERSIONS = itertools.count(1)
+
+
+# =========================================================
+# CLEANING & TYPING
+# =========================================================
+def normalize_hotel(hotels):
+    """Normalisasi nama hotel: trim dan rapikan spasi berlebih (dihitung sekali per nama unik)."""
+    hotels = hotels.astype(str)
+    names = {h: ' '.join(h.split()) for h in hotels.unique() if isinstance(h, str)}
+    return hotels.map(names)
+
+
+def clean_frame(df):
+    """Rapikan tipe kolom dan hitung Room_Revenue di memori (tanpa menulis ke disk)."""
+    df = df.copy()
+    for c in REQUIRED_COLUMNS:
+        if c not in df.columns:
+            df[c] = None
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    df['Hotel'] = normalize_hotel(df['Hotel'])
+    for c in ['Room_Available', 'Room_Sold']:
+        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0).round().astype('int64')
+    df['ADR'] = pd.to_numeric(df['ADR'], errors='coerce').fillna(0).astype('float64')
+    df['Room_Revenue'] = df['Room_Sold'] * df['ADR']
+    return apply_schema(df[COLUMNS].reset_index(drop=True))
+
+
+def apply_schema(df):
+    """
+    Cast kolom ke SCHEMA (murah bila tipenya sudah benar). Dipakai lagi setelah concat,
+    karena concat category dengan kategori berbeda kembali menjadi object.
+    """
+    df = df.astype({c: t for c, t in SCHEMA.items() if c in df.columns and c != 'Hotel'})
+    if 'Hotel' in df.columns:
+        hotels = df['Hotel'].astype('category')
+        df['Hotel'] = hotels.cat.remove_unused_categories()
+    return df
+
+
+def memory_report(df):
+    """
+    Jejak memori frame fakta per kolom: skema kompak saat ini vs layout lama (LEGACY_SCHEMA).
+    Return DataFrame (Column, Dtype, Bytes, Bytes_per_row, Legacy_Dtype, Legacy_Bytes,
+    Legacy_Bytes_per_row) dengan baris TOTAL di akhir.
+    """
+    df = df[COLUMNS]
+    legacy = df.astype(LEGACY_SCHEMA)
+    rows = max(len(df), 1)
+    now = df.memory_usage(index=False, deep=True)
+    before = legacy.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        'Column': COLUMNS,
+        'Dtype': [str(t) for t in df.dtypes],
+        'Bytes': now.to_numpy(),
+        'Legacy_Dtype': [str(t) for t in legacy.dtypes],
+        'Legacy_Bytes': before.to_numpy(),
+    })
+    total = {'Column': 'TOTAL', 'Dtype': '', 'Bytes': int(now.sum()),
+             'Legacy_Dtype': '', 'Legacy_Bytes': int(before.sum())}
+    report = pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+    report['Bytes_per_row'] = (report['Bytes'] / rows).round(1)
+    report['Legacy_Bytes_per_row'] = (report['Legacy_Bytes'] / rows).round(1)
+    return report[['Column', 'Dtype', 'Bytes', 'Bytes_per_row', 'Legacy_Dtype', 'Legacy_Bytes', 'Legacy_Bytes_per_row']]
+
+
+def empty_frame():
+    return clean_frame(pd.DataFrame(columns=REQUIRED_COLUMNS))
+
+
+def months_of(dates):
+    """Set (year, month) yang disentuh oleh kumpulan tanggal."""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    keys = set(zip(dates.dt.year.dropna().astype(int), dates.dt.month.dropna().astype(int)))
+    if dates.isna().any():
+        keys.add(UNDATED)
+    return keys
+
+
+def dedupe(df):
+    """Tegakkan primary key (Date, Hotel): baris terakhir yang menang."""
+    return df.drop_duplicates(KEY, keep='last').reset_index(drop=True)
+
+
+def _date_keys(dates):
+    return pd.to_datetime(dates).astype('datetime64[ns]').to_numpy().view('int64').tolist()
+
+
+def row_key(date, hotel):
+    return (pd.Timestamp(date).value, ' '.join(str(hotel).split()))
+
+
+def _replay(base, journal):
+    """Terapkan journal (upsert/delete, urut sesuai file) di atas data utama."""
+    if journal.empty:
+        return dedupe(base)
+    combined = pd.concat([base.assign(Op='upsert'), journal], ignore_index=True)
+    combined = combined.drop_duplicates(KEY, keep='last')
+    return combined[combined['Op'] != 'delete'][COLUMNS].reset_index(drop=True)
+
+
+def _filter_range(df, start=None, end=None):
+    if start is None and end is None:
+        return df
+    mask = df['Date'].notna()
+    if start is not None:
+        mask &= df['Date'] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df['Date'] <= pd.Timestamp(end)
+    return df[mask].reset_index(drop=True)
+
+
+def _file_signature(paths):
+    """(path, mtime_ns, size) untuk setiap file yang ada; berubah setiap kali file ditulis."""
+    sig = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        sig.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(sorted(sig))
+
+
+def _atomic_replace(tmp_path, final_path):
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(tmp_path, final_path)
+
+
+# =========================================================
+# CSV BACKEND (format lama, tetap dipakai untuk import/export)
+# =========================================================
+class CsvBackend:
+    name = 'csv'
+
+    def __init__(self, path):
+        self.path = path
+
+    def is_initialized(self):
+        return os.path.exists(self.path)
+
+    def files(self):
+        return [self.path]
+
+    def read(self, start=None, end=None):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return empty_frame()
+        df = clean_frame(pd.read_csv(self.path, parse_dates=['Date']))
+        return _filter_range(df, start, end)
+
+    def read_months(self, months):
+        # CSV tidak dipartisi: write() butuh seluruh isi file
+        return self.read()
+
+    def write(self, df, months=None):
+        # CSV tidak dipartisi: selalu tulis ulang seluruh file
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        df[COLUMNS].to_csv(tmp_path, index=False)
+        _atomic_replace(tmp_path, self.path)
+
+
+# =========================================================
+# PARQUET BACKEND (dipartisi per tahun/bulan, kolom bertipe)
+# =========================================================
+class ParquetBackend:
+    name = 'parquet'
+
+    def __init__(self, root):
+        self.root = root
+
+    def is_initialized(self):
+        return os.path.isdir(self.root)
+
+    def files(self):
+        return [self._partition_path(k) for k in self.partitions()]
+
+    def _partition_path(self, key):
+        year, month = key
+        if key == UNDATED:
+            return os.path.join(self.root, 'undated', 'part-0.parquet')
+        return os.path.join(self.root, f'year={year:04d}', f'month={month:02d}', 'part-0.parquet')
+
+    def partitions(self):
+        keys = []
+        for path in glob.glob(os.path.join(self.root, 'year=*', 'month=*', 'part-0.parquet')):
+            month_dir = os.path.dirname(path)
+            year = int(os.path.basename(os.path.dirname(month_dir)).split('=')[1])
+            month = int(os.path.basename(month_dir).split('=')[1])
+            keys.append((year, month))
+        if os.path.exists(self._partition_path(UNDATED)):
+            keys.append(UNDATED)
+        return sorted(keys)
+
+    def _prune(self, start=None, end=None):
+        """Pilih partisi yang overlap dengan rentang [start, end]."""
+        keys = self.partitions()
+        if start is None and end is None:
+            return keys
+        lo = (pd.Timestamp(start).year, pd.Timestamp(start).month) if start is not None else (1, 1)
+        hi = (pd.Timestamp(end).year, pd.Timestamp(end).month) if end is not None else (9999, 12)
+        return [k for k in keys if k != UNDATED and lo <= k <= hi]
+
+    def read(self, start=None, end=None):
+        frames = [pd.read_parquet(self._partition_path(k)) for k in self._prune(start, end)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return empty_frame()
+        df = clean_frame(pd.concat(frames, ignore_index=True))
+        return _filter_range(df, start, end)
+
+    def read_months(self, months):
+        paths = [self._partition_path(k) for k in sorted(months)]
+        frames = [pd.read_parquet(p) for p in paths if os.path.exists(p)]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return empty_frame()
+        return clean_frame(pd.concat(frames, ignore_index=True))
+
+    def write(self, df, months=None):
+        """Tulis ulang partisi yang disentuh saja (semua partisi jika months=None)."""
+        os.makedirs(self.root, exist_ok=True)
+        df = df[COLUMNS]
+        if months is None:
+            months = months_of(df['Date']) | set(self.partitions())
+        year = df['Date'].dt.year
+        month = df['Date'].dt.month
+        for key in months:
+            if key == UNDATED:
+                part = df[df['Date'].isna()]
+            else:
+                part = df[(year == key[0]) & (month == key[1])]
+            path = self._partition_path(key)
+            if part.empty:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            part.to_parquet(tmp_path, index=False)
+            _atomic_replace(tmp_path, path)
+
+
+def _has_parquet_engine():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# =========================================================
+# KEYED FRAME (hash index di memori)
+# =========================================================
+class KeyedFrame:
+    """
+    Frame dengan primary key (Date, Hotel) dan hash index key -> posisi baris.
+    Upsert/delete satu baris O(1); penggabungan ke DataFrame ditunda sampai
+    frame dibaca lagi (to_frame). Baris baru ditempel di akhir (posisinya sudah ada
+    di index) dan baris yang dihapus hanya ditandai di mask; index tidak pernah
+    dibangun ulang. Baris mati dibuang saat frame dibangun ulang (load/save/compact).
+    Frame dari to_frame tidak pernah diubah lagi: update baris lama ditulis ke salinan.
+    """
+
+    def __init__(self, df):
+        self._rows = apply_schema(dedupe(df))
+        self._pending = []
+        self._dropped = []
+        self._alive = None  # mask baris yang masih hidup; None = semua hidup
+        self._view = self._rows
+        self._shared = False  # _rows sudah diberikan ke luar (to_frame/snapshot): jangan diubah in place
+        self._index = dict(zip(zip(_date_keys(self._rows['Date']), self._rows['Hotel']), range(len(self._rows))))
+        self._positions = {c: self._rows.columns.get_loc(c) for c in COLUMNS}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def _get(self, pos):
+        if pos < len(self._rows):
+            return {c: self._rows.iat[pos, self._positions[c]] for c in VALUE_COLUMNS}
+        return self._pending[pos - len(self._rows)]
+
+    def upsert(self, row):
+        """row: dict hasil clean_frame. Return 'inserted' / 'updated' / 'unchanged'."""
+        key = row_key(row['Date'], row['Hotel'])
+        pos = self._index.get(key)
+        if pos is None:
+            self._index[key] = len(self._rows) + len(self._pending)
+            self._pending.append(dict(row))
+            return 'inserted'
+        current = self._get(pos)
+        if all(current[c] == row[c] for c in VALUE_COLUMNS):
+            return 'unchanged'
+        if pos < len(self._rows):
+            self._own_rows()
+            for c in VALUE_COLUMNS + ['Room_Revenue']:
+                self._rows.iat[pos, self._positions[c]] = row[c]
+        else:
+            self._pending[pos - len(self._rows)] = dict(row)
+        return 'updated'
+
+    def _own_rows(self):
+        # Frame yang sudah diberikan lewat to_frame dipakai bersama: update ditulis ke salinan
+        if self._shared:
+            self._rows = self._rows.copy()
+            self._shared = False
+        self._view = None
+
+    def row_count(self):
+        """Jumlah posisi baris (termasuk baris mati); posisi baru selalu >= nilai sebelumnya."""
+        return len(self._rows) + len(self._pending)
+
+    def snapshot(self):
+        """Frame semua posisi baris saat ini; tidak diubah lagi oleh upsert berikutnya."""
+        if self._pending:
+            self._append_pending()
+        self._shared = True
+        return self._rows
+
+    def rows_at(self, positions):
+        """Baris (kolom COLUMNS) pada posisi tertentu, dengan nilai terkini."""
+        if self._pending:
+            self._append_pending()
+        return self._rows.iloc[positions][COLUMNS]
+
+    def delete(self, key):
+        pos = self._index.pop(key, None)
+        if pos is None:
+            return False
+        self._dropped.append(pos)
+        return True
+
+    def upsert_many(self, df):
+        """
+        Upsert massal; df bersih & unik per key. Return (posisi baris tiap key, mask baris
+        yang ditulis: key baru atau nilainya berubah). Key baru ditempel di akhir dalam satu
+        concat, update ditulis vectorized (ke salinan bila frame sudah diberikan ke pembaca).
+        """
+        if self._pending:
+            self._append_pending()
+        keys = list(zip(_date_keys(df['Date']), df['Hotel'].astype(object)))
+        positions = np.fromiter((self._index.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+        new = positions < 0
+        changed = new.copy()
+        old = np.flatnonzero(~new)
+        if len(old):
+            pos = positions[old]
+            diff = np.zeros(len(old), dtype=bool)
+            for c in VALUE_COLUMNS:
+                diff |= self._rows.iloc[pos, self._positions[c]].to_numpy() != df[c].to_numpy()[old]
+            changed[old] = diff
+            if diff.any():
+                self._own_rows()
+                for c in VALUE_COLUMNS + ['Room_Revenue']:
+                    self._rows.iloc[pos[diff], self._positions[c]] = df[c].to_numpy()[old[diff]]
+        if new.any():
+            start = len(self._rows)
+            self._append(df[new])
+            positions[new] = np.arange(start, len(self._rows))
+            self._index.update(zip((k for k, n in zip(keys, new) if n), positions[new].tolist()))
+        return positions, changed
+
+    def _append_pending(self):
+        self._append(pd.DataFrame(self._pending, columns=COLUMNS))
+        self._pending = []
+
+    def _append(self, new):
+        """Tempel baris di akhir _rows dengan tipe yang sama (kategori hotel diperluas)."""
+        new = apply_schema(new[COLUMNS].reset_index(drop=True))
+        hotels = self._rows['Hotel']
+        missing = new['Hotel'].cat.categories.difference(hotels.cat.categories)
+        rows = self._rows
+        if len(missing):
+            # Urutan kategori tetap terurut seperti hasil load (groupby mengikuti urutan ini)
+            hotels = hotels.cat.set_categories(hotels.cat.categories.union(missing))
+            rows = rows.assign(Hotel=hotels)
+        new['Hotel'] = pd.Categorical(new['Hotel'].astype(object), categories=hotels.cat.categories)
+        self._rows = pd.concat([rows, new], ignore_index=True)
+        self._positions = {c: self._rows.columns.get_loc(c) for c in COLUMNS}
+        if self._alive is not None:
+            self._alive = np.concatenate([self._alive, np.ones(len(new), dtype=bool)])
+        self._view = None
+        self._shared = False
+
+    def to_frame(self):
+        if self._pending:
+            self._append_pending()
+        if self._dropped:
+            if self._alive is None:
+                self._alive = np.ones(len(self._rows), dtype=bool)
+            self._alive[self._dropped] = False
+            self._dropped = []
+            self._view = None
+        if self._view is None:
+            if self._alive is None:
+                self._view = self._rows
+                self._shared = True
+            else:
+                self._view = self._rows[self._alive].reset_index(drop=True)
+        return self._view
+
+
+# =========================================================
+# DATA STORE
+# =========================================================
+class DataStore:
+    """
+    Pintu masuk tunggal untuk baca/tulis comparative_data.
+    Data = storage utama (backend) + journal append-only berisi operasi
+    upsert/delete yang belum dikompaksi. (Date, Hotel) adalah primary key.
+
+    Satu instance dipakai bersama oleh semua session (lihat open_store). Frame hasil
+    load() di-cache dengan kunci signature file (path + mtime + size): rerun tanpa
+    perubahan file tidak membaca disk sama sekali. Tulisan lewat store ini langsung
+    memperbarui frame di memori (write-through); tulisan dari luar terdeteksi lewat signature.
+    Frame yang dikembalikan dipakai bersama — jangan dimutasi.
+    """
+
+    def __init__(self, backend, journal_path):
+        self.backend = backend
+        self.journal_path = journal_path
+        self._keyed = None
+        self._cube = None
+        self._signature = None
+        self.version = 0
+
+    def _bump_version(self):
+        self.version = next(_VERSIONS)
+
+    def signature(self):
+        return _file_signature(self.backend.files() + [self.journal_path])
+
+    def _refresh_signature(self, in_sync):
+        # Hanya bila frame di memori sebelumnya sinkron dengan disk; kalau tidak, biarkan load() membaca ulang
+        self._signature = self.signature() if in_sync else None
+
+    # ---------------------------
+    # Journal
+    # ---------------------------
+    def journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    def _read_journal(self):
+        if self.journal_size() == 0:
+            return empty_frame().assign(Op=pd.Series(dtype=object))
+        raw = pd.read_csv(self.journal_path, parse_dates=['Date'])
+        ops = raw['Op'].fillna('upsert') if 'Op' in raw.columns else 'upsert'
+        return clean_frame(raw).assign(Op=ops)
+
+    def _append_journal(self, rows, op='upsert'):
+        """Tambahkan operasi ke journal. Biaya sebanding jumlah baris, bukan total history."""
+        if rows.empty:
+            return
+        rows = rows[COLUMNS].assign(Op=op)
+        with _WRITE_LOCK:
+            text = rows.to_csv(index=False, header=self.journal_size() == 0)
+            self._write_journal(lambda f: f.write(text))
+
+    def _append_journal_segment(self, segment_path):
+        """Tempel segmen journal staging (CSV berheader, format journal) ke journal dalam satu append."""
+        with _WRITE_LOCK, open(segment_path, encoding='utf-8', newline='') as src:
+            header = src.readline()
+            with_header = self.journal_size() == 0
+
+            def write(f):
+                if with_header:
+                    f.write(header)
+                shutil.copyfileobj(src, f)
+            self._write_journal(write)
+
+    def _write_journal(self, write):
+        in_sync = self._signature is not None and self._signature == self.signature()
+        os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8', newline='') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh_signature(in_sync)
+
+    def compact(self):
+        """Gabungkan journal ke storage utama (hanya partisi yang disentuh). Return jumlah operasi."""
+        with _WRITE_LOCK:
+            in_sync = self._signature is not None and self._signature == self.signature()
+            journal = self._read_journal()
+            if not journal.empty:
+                months = months_of(journal['Date'])
+                base = self.backend.read_months(months)
+                self.backend.write(_replay(base, journal), months=months)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._refresh_signature(in_sync)
+        return len(journal)
+
+    # ---------------------------
+    # Baca / tulis
+    # ---------------------------
+    def load(self, start=None, end=None):
+        with _WRITE_LOCK:
+            if self.journal_size() > JOURNAL_COMPACT_BYTES:
+                self.compact()
+            if start is None and end is None:
+                sig = self.signature()
+                if self._keyed is not None and sig == self._signature:
+                    _CACHE_STATS['dataset_hits'] += 1
+                    return self._keyed.to_frame()
+                _CACHE_STATS['dataset_misses'] += 1
+            base = self.backend.read(start=start, end=end)
+            df = apply_schema(_replay(base, _filter_range(self._read_journal(), start, end)))
+            if start is None and end is None:
+                self._keyed = KeyedFrame(df)
+                self._cube = None
+                self._signature = sig
+                self._bump_version()
+                return self._keyed.to_frame()
+            return df
+
+    @property
+    def frame(self):
+        with _WRITE_LOCK:
+            if self._keyed is None:
+                return self.load()
+            return self._keyed.to_frame()
+
+    @property
+    def cube(self):
+        """DailyCube dari data saat ini; dibangun sekali lalu di-update inkremental oleh upsert/delete."""
+        with _WRITE_LOCK:
+            if self._cube is None:
+                self._cube = DailyCube(self.frame)
+            return self._cube
+
+    def upsert_row(self, row):
+        """Insert/update satu malam untuk satu hotel. Return 'inserted' / 'updated' / 'unchanged'."""
+        one = clean_frame(pd.DataFrame([row]))
+        with _WRITE_LOCK:
+            if self._keyed is None:
+                self.load()
+            status = self._keyed.upsert(one.iloc[0].to_dict())
+            if status != 'unchanged':
+                self._append_journal(one)
+                if self._cube is not None:
+                    self._cube.upsert(one)
+                self._bump_version()
+        return status
+
+    def delete(self, date, hotel):
+        tombstone = clean_frame(pd.DataFrame({'Date': [date], 'Hotel': [hotel]}))
+        with _WRITE_LOCK:
+            if self._keyed is None:
+                self.load()
+            if not self._keyed.delete(row_key(date, hotel)):
+                return False
+            self._append_journal(tombstone, op='delete')
+            if self._cube is not None:
+                self._cube.delete(tombstone['Date'].iloc[0], tombstone['Hotel'].iloc[0])
+            self._bump_version()
+        return True
+
+    def upsert_frame(self, new_df):
+        """
+        Merge massal (vectorized) berdasarkan (Date, Hotel).
+        Return dict jumlah baris inserted / updated / unchanged.
+        """
+        return self.upsert_chunks([dedupe(clean_frame(new_df))])
+
+    def upsert_chunks(self, chunks):
+        """
+        Merge banyak frame (iterable, boleh generator yang membaca dari disk) dalam SATU
+        transaksi. Tiap chunk sudah bersih (clean_frame) dan unik per key (dedupe); key
+        yang sama di chunk lebih akhir yang menang. Tiap chunk langsung digabung ke frame
+        di memori (memori tambahan sebatas satu chunk, berapa pun ukuran upload). Di akhir,
+        baris yang benar-benar berubah dibanding isi sebelum transaksi ditulis per potongan
+        ke segmen journal staging, lalu segmen itu ditempel ke journal sekali (satu append,
+        satu versi data). Bila gagal di tengah, journal tidak tersentuh dan frame di memori
+        dibuang agar load() berikutnya membaca ulang dari disk.
+        Return dict jumlah key unik inserted / updated / unchanged.
+        """
+        staging_path = f'{self.journal_path}.{os.getpid()}.staging'
+        with _WRITE_LOCK:
+            if self._keyed is None:
+                self.load()
+            keyed = self._keyed
+            original = keyed.snapshot()
+            n_before = len(original)
+            # Per posisi lama: muncul di upload / pernah ditimpa nilai lain dalam transaksi ini
+            seen = np.zeros(n_before, dtype=bool)
+            dirty = np.zeros(n_before, dtype=bool)
+            try:
+                for chunk in chunks:
+                    if chunk.empty:
+                        continue
+                    positions, changed = keyed.upsert_many(chunk)
+                    old = positions < n_before
+                    seen[positions[old]] = True
+                    dirty[positions[old & changed]] = True
+
+                # Key yang ditimpa lalu kembali ke nilai lama (mis. file berikutnya) tidak ditulis
+                updated = []
+                dirty_positions = np.flatnonzero(dirty)
+                for start in range(0, len(dirty_positions), WRITE_CHUNK_ROWS):
+                    pos = dirty_positions[start:start + WRITE_CHUNK_ROWS]
+                    before, after = original.iloc[pos], keyed.rows_at(pos)
+                    diff = np.zeros(len(pos), dtype=bool)
+                    for c in VALUE_COLUMNS:
+                        diff |= before[c].to_numpy() != after[c].to_numpy()
+                    updated.append(pos[diff])
+                updated = np.concatenate(updated) if updated else np.zeros(0, dtype=np.int64)
+                written = np.concatenate([updated, np.arange(n_before, keyed.row_count())])
+
+                for start in range(0, len(written), WRITE_CHUNK_ROWS):
+                    rows = keyed.rows_at(written[start:start + WRITE_CHUNK_ROWS])
+                    os.makedirs(os.path.dirname(staging_path) or '.', exist_ok=True)
+                    with open(staging_path, 'a', encoding='utf-8', newline='') as f:
+                        f.write(rows.assign(Op='upsert').to_csv(index=False, header=start == 0))
+                    if self._cube is not None:
+                        self._cube.upsert(rows)
+                if len(written):
+                    self._append_journal_segment(staging_path)
+                    self._bump_version()
+            except BaseException:
+                self._keyed = None
+                self._cube = None
+                self._signature = None
+                raise
+            finally:
+                if os.path.exists(staging_path):
+                    os.remove(staging_path)
+        return {
+            'inserted': int(len(written) - len(updated)),
+            'updated': int(len(updated)),
+            'unchanged': int(seen.sum() - len(updated)),
+        }
+
+    def rename_hotels(self, mapping):
+        """
+        Ganti nama hotel di data tersimpan ({nama lama: nama baru}), mis. alias → nama kanonik.
+        Bila malam yang sama sudah ada dengan nama baru, baris yang sudah ada yang dipertahankan.
+        Hanya partisi bulan yang terdampak yang ditulis ulang. Return jumlah baris yang diganti.
+        """
+        with _WRITE_LOCK:
+            df = self.frame
+            mask = df['Hotel'].isin(list(mapping))
+            if not mask.any():
+                return 0
+            renamed = df[mask].assign(Hotel=df.loc[mask, 'Hotel'].astype(object).map(mapping))
+            self.save(pd.concat([renamed, df[~mask]], ignore_index=True), months=months_of(renamed['Date']))
+            return int(mask.sum())
+
+    def save(self, df, months=None):
+        """
+        Simpan frame penuh. Untuk Parquet hanya partisi `months` yang ditulis ulang;
+        df dianggap sudah memuat isi journal sehingga journal dikosongkan.
+        """
+        with _WRITE_LOCK:
+            if months is not None:
+                months = set(months) | months_of(self._read_journal()['Date'])
+            df = dedupe(clean_frame(df))
+            self.backend.write(df, months=months)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._keyed = KeyedFrame(df)
+            self._cube = None
+            self._signature = self.signature()
+            self._bump_version()
+
+    def import_csv(self, path):
+        df = dedupe(CsvBackend(path).read())
+        with _WRITE_LOCK:
+            self.backend.write(df)
+            self._signature = None
+        return df
+
+    def export_csv(self, df=None):
+        df = self.frame if df is None else df
+        return df[COLUMNS].to_csv(index=False).encode('utf-8')
+
+
+def open_store(data_dir, backend=None):
+    """
+    Buka storage di data_dir. Backend dipilih lewat argumen atau env COMPSET_STORAGE
+    ('parquet' default bila pyarrow tersedia, 'csv' sebagai fallback).
+    Saat Parquet pertama kali dipakai, comparative_data.csv lama diimpor otomatis.
+    Instance di-cache per (data_dir, backend) dan dipakai bersama semua session.
+    """
+    csv_path = os.path.join(data_dir, 'comparative_data.csv')
+    journal_path = os.path.join(data_dir, 'comparative_data.journal.csv')
+    kind = backend or os.environ.get('COMPSET_STORAGE', 'parquet')
+    if kind == 'parquet' and not _has_parquet_engine():
+        kind = 'csv'
+    cache_key = (os.path.abspath(data_dir), kind)
+    with _WRITE_LOCK:
+        store = _STORES.get(cache_key)
+        if store is not None:
+            return store
+        if kind == 'parquet':
+            store = DataStore(ParquetBackend(os.path.join(data_dir, 'comparative_data')), journal_path)
+            if not store.backend.is_initialized():
+                if os.path.exists(csv_path):
+                    store.import_csv(csv_path)
+                else:
+                    os.makedirs(store.backend.root, exist_ok=True)
+        else:
+            store = DataStore(CsvBackend(csv_path), journal_path)
+        _STORES[cache_key] = store
+        return store
+
+
+def read_csv_cached(path):
+    """Baca CSV kecil (mis. room_capacity.csv) dengan cache level proses berkunci path + mtime + size."""
+    sig = _file_signature([path])
+    with _WRITE_LOCK:
+        cached = _FILE_CACHE.get(path)
+        if cached is not None and cached[0] == sig:
+            _CACHE_STATS['file_hits'] += 1
+            return cached[1].copy()
+        _CACHE_STATS['file_misses'] += 1
+        df = pd.read_csv(path)
+        _FILE_CACHE[path] = (sig, df)
+        return df.copy()
+
+
+def cache_stats():
+    return dict(_CACHE_STATS)
@@ -3,51 +3,8 @@
 # =========================================================
 import streamlit as st
 import pandas as pd
-import altair as alt
-import os
-from pathlib import Path
-from datetime import datetime
-from pdf_report import generate_graphic_pdf
-
-# ---------------------------------
-# Data directory helper (robust)
-# ---------------------------------
-def _is_writable(dir_path: str) -> bool:
-    try:
-        os.makedirs(dir_path, exist_ok=True)
-        test_file = os.path.join(dir_path, ".write_test")
-        with open(test_file, "w") as f:
-            f.write("ok")
-        os.remove(test_file)
-        return True
-    except Exception:
-        return False
-
-def get_data_dir() -> str:
-    # 1) Fixed '/data'
-    fixed_dir = "/data"
-    if _is_writable(fixed_dir):
-        return fixed_dir
-    # 2) Streamlit secrets
-    try:
-        secrets_dir = st.secrets.get("DATA_DIR")  # type: ignore[attr-defined]
-        if secrets_dir and _is_writable(secrets_dir):
-            return secrets_dir
-    except Exception:
-        pass
-    # 3) Environment variable
-    env_dir = os.environ.get("DATA_DIR")
-    if env_dir and _is_writable(env_dir):
-        return env_dir
-    # 4) Streamlit Cloud persistent storage
-    mount_dir = "/mount/data"
-    if _is_writable(mount_dir):
-        return mount_dir
-    # 5) Fallback: project ./data
-    local_dir = os.path.join(os.getcwd(), "data")
-    os.makedirs(local_dir, exist_ok=True)
-    return local_dir
-
+import data_access
+import report_jobs
 
 # =========================================================
 # Fungsi Utama: Generate Graphic Report
@@ -57,45 +14,14 @@ def generate_graphic_report(show_pdf_button=True):
     st.markdown("<div class='mx-auto max-w-screen-2xl px-4 py-2'>", unsafe_allow_html=True)
 
     # ============================================
-    # Load Data
-    # ============================================
-    data_path = Path(get_data_dir()) / "comparative_data.csv"
-    if not data_path.exists():
-        st.error("❌ File 'comparative_data.csv' tidak ditemukan di folder project.")
-        return
-
-    df = pd.read_csv(data_path)
-
-    if "Room_Revenue" not in df.columns:
-        rs = pd.to_numeric(df.get("Room_Sold", 0), errors="coerce").fillna(0)
-        adr = pd.to_numeric(df.get("ADR", 0), errors="coerce").fillna(0)
-        df["Room_Revenue"] = rs * adr
-
-    required_cols = ["Date", "Hotel", "Room_Available", "Room_Sold", "ADR", "Room_Revenue"]
-    if not all(col in df.columns for col in required_cols):
-        st.error("❌ Kolom pada 'comparative_data.csv' tidak lengkap.")
-        return
-
-    # ============================================
-    # Data Cleaning & Feature Engineering
+    # Load Data (DataStore bersama, tanpa baca disk tambahan)
     # ============================================
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df["Occupancy"] = (df["Room_Sold"] / df["Room_Available"]) * 100
-    df["RevPAR"] = df["Room_Revenue"] / df["Room_Available"]
-
-#    available_dates = sorted(df["Date"].dropna().unique())
-#    selected_date = st.selectbox("📅 Pilih tanggal data:", available_dates, index=len(available_dates)-1)
-#    df_selected = df[df["Date"] == selected_date]
-    # Pastikan kolom Date sudah berbentuk datetime
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-
-    # Ambil hanya tanggal unik tanpa waktu
-    available_dates = sorted(df["Date"].dropna().dt.date.unique())
-    if len(available_dates) == 0:
+    store = data_access.get_store()
+    bounds = data_access.date_bounds(store)
+    if bounds is None:
         st.error("Tidak ada tanggal valid pada data.")
         return
-    min_date = available_dates[0]
-    max_date = available_dates[-1]
+    min_date, max_date = bounds
     last_date = max_date
     selected_date = st.date_input(
         "📅 Pilih tanggal data:",
@@ -104,38 +30,21 @@ def generate_graphic_report(show_pdf_button=True):
         max_value=max_date
     )
 
-    # Filter dataframe berdasarkan tanggal terpilih
-    df_selected = df[df["Date"].dt.date == selected_date]
-
-
     # ============================================
-    # Agregasi per Hotel
+    # Agregasi per Hotel (metrik yang sama dengan Dashboard, ADR tertimbang Room_Sold)
     # ============================================
-    summary = df_selected.groupby("Hotel").agg({
-        "Room_Available": "sum",
-        "Room_Sold": "sum",
-        "Room_Revenue": "sum",
-        "ADR": "mean",
-        "Occupancy": "mean",
-        "RevPAR": "mean"
-    }).reset_index()
+    summary = data_access.graphic_summary(selected_date, store)
+    if summary.empty:
+        st.info("Tidak ada data untuk tanggal ini.")
+        return
 
-    # Total Compset
+    # Total Compset (untuk garis pembanding di grafik)
     total = {
-        "Room_Available": summary["Room_Available"].sum(),
-        "Room_Sold": summary["Room_Sold"].sum(),
         "Room_Revenue": summary["Room_Revenue"].sum(),
-        "ADR": summary["ADR"].mean(),
-        "Occupancy": (summary["Room_Sold"].sum() / summary["Room_Available"].sum()) * 100,
-        "RevPAR": summary["Room_Revenue"].sum() / summary["Room_Available"].sum()
+        "Occupancy": summary["Room_Sold"].sum() / summary["Room_Available"].sum() * 100
+        if summary["Room_Available"].sum() > 0 else 0.0,
     }
 
-    # Tambahkan Index: MPI, ARI, RGI, Fair Share
-    summary["MPI"] = (summary["Occupancy"] / total["Occupancy"]) * 100
-    summary["ARI"] = (summary["ADR"] / total["ADR"]) * 100
-    summary["RGI"] = (summary["RevPAR"] / total["RevPAR"]) * 100
-    summary["Market_Fair_Share"] = (summary["Room_Available"] / total["Room_Available"]) * 100
-
     # ============================================
     # Tampilkan Data Summary
     # ============================================
@@ -159,6 +68,9 @@ def generate_graphic_report(show_pdf_button=True):
     st.markdown("<div class='bg-white rounded-xl border border-emerald-200 shadow-sm p-4 md:p-6 mb-6'>", unsafe_allow_html=True)
     st.markdown("### 📈 Occupancy vs Compset")
 
+    # altair hanya di-load saat halaman grafik dibuka (bukan saat start app)
+    import altair as alt
+
     occ_chart = (
         alt.Chart(summary)
         .mark_bar()
@@ -272,6 +184,37 @@ def generate_graphic_report(show_pdf_button=True):
     st.altair_chart(fair_combined, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
+    # Tren rolling (mis. RGI rolling 28 malam selama setahun): satu batch dari prefix sum cube
+    st.markdown("<div class='bg-white rounded-xl border border-emerald-200 shadow-sm p-4 md:p-6 mb-6'>", unsafe_allow_html=True)
+    st.markdown("### 📉 Tren Rolling (365 hari)")
+    col_window, col_metric = st.columns(2)
+    windows = {"7 malam": "r7", "28 malam": "r28", "90 malam": "r90"}
+    window = col_window.selectbox("Window:", list(windows), index=1)
+    metric = col_metric.selectbox("Metrik:", ["RGI", "MPI", "ARI", "Occ%", "RevPAR", "ADR"])
+    trend = data_access.metric_trend(selected_date, windows[window], metric, store=store)
+    if trend.empty:
+        st.info("Tidak ada data untuk tren.")
+    else:
+        trend_data = trend.reset_index().melt(id_vars="Date", var_name="Hotel", value_name="Value").dropna()
+        trend_chart = (
+            alt.Chart(trend_data)
+            .mark_line()
+            .encode(
+                x=alt.X("Date:T", title="Tanggal"),
+                y=alt.Y("Value:Q", title=f"{metric} rolling {window}"),
+                color=alt.Color("Hotel:N", scale=alt.Scale(scheme="tableau10"))
+            )
+            .properties(height=320)
+        ).configure_axis(
+            grid=True, gridColor="#e2e8f0", labelColor="#065f46", titleColor="#065f46"
+        ).configure_legend(
+            orient="top", labelColor="#065f46", titleColor="#065f46"
+        ).properties(
+            background="white"
+        )
+        st.altair_chart(trend_chart, use_container_width=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
     # ============================================
     # Sidebar - Generate PDF
     # ============================================
@@ -280,18 +223,14 @@ def generate_graphic_report(show_pdf_button=True):
         st.sidebar.subheader("📄 Generate & Download PDF Report")
 
         if st.sidebar.button("📄 Generate Graphic PDF Report"):
-            pdf_path = generate_graphic_pdf(summary, report_date=selected_date)
-            if pdf_path and os.path.exists(pdf_path):
-                st.sidebar.success("✅ PDF report generated successfully!")
-                st.sidebar.write(f"📂 Saved at: `{pdf_path}`")
-
-                with open(pdf_path, "rb") as f:
-                    st.sidebar.download_button(
-                        label="⬇️ Download PDF Report",
-                        data=f,
-                        file_name=Path(pdf_path).name,
-                        mime="application/pdf"
-                    )
-            else:
-                st.sidebar.error("❌ Failed to generate PDF report. Please check the log.")
+            # Render di process pool; status & link unduh muncul di sidebar (🧾 PDF Jobs)
+            try:
+                job_id = report_jobs.submit(
+                    "graphic", summary, selected_date, None,
+                    file_name=f"graphic_report_{selected_date.strftime('%Y%m%d')}.pdf"
+                )
+                st.session_state.setdefault("pdf_jobs", []).append(job_id)
+                st.sidebar.info("⏳ PDF sedang dibuat di background.")
+            except report_jobs.JobQueueFull as e:
+                st.sidebar.warning(f"⚠️ {e}")
     st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,206 @@
+# =========================================================
+# hotels.py — Dimensi hotel: ID, nama kanonik, alias, kapasitas
+# =========================================================
+# Nama kanonik = nama di room_capacity.csv. Variasi penulisan dari PMS/export
+# (mis. "Daun Bali Seminyak" vs "Daun Bali Seminyak Hotel", "Kamanya" vs "Kamania")
+# didaftarkan di hotel_aliases.csv dan dipetakan ke nama kanonik saat ingest.
+# Kapasitas bisa berubah (renovasi, kamar out of order): room_capacity.csv boleh berisi
+# beberapa baris per hotel dengan kolom Valid_From; tiap baris berlaku sampai Valid_From
+# berikutnya. Baris tanpa Valid_From berlaku sejak awal.
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_store
+
+ALIASES_FILE = 'hotel_aliases.csv'
+CAPACITY_COLUMNS = ['Hotel', 'Room_Available', 'Valid_From']
+
+# Kunci lookup kapasitas = kode hotel * _DAY_SPAN + (hari sejak epoch + _DAY_OFFSET)
+_DAY_OFFSET = 2 ** 19
+_DAY_SPAN = 2 ** 20
+
+# Variasi yang sudah diketahui; anggota yang ada di room_capacity.csv menjadi nama kanonik
+KNOWN_VARIANTS = [
+    ['Daun Bali Seminyak Hotel', 'Daun Bali Seminyak'],
+    ['Kamania Hotel Petitenget', 'Kamania Petitenget', 'Kamanya Hotel Petitenget', 'Kamanya Petitenget'],
+]
+
+
+def _lookup_key(names):
+    # Pencocokan tidak peka huruf besar/kecil & spasi berlebih
+    names = data_store.normalize_hotel(names)
+    # Series kosong hasil map bertipe float; .str hanya untuk yang berisi
+    return names.str.casefold() if len(names) else names.astype(object)
+
+
+def _epoch_days(dates):
+    """Tanggal → (hari sejak 1970-01-01 sebagai int64, mask tanggal valid)."""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    valid = dates.notna().to_numpy()
+    days = dates.dt.normalize().to_numpy(dtype='datetime64[D]').astype('int64')
+    return np.where(valid, days, 0), valid
+
+
+def default_aliases(canonical_names):
+    """Frame (Alias, Hotel) dari KNOWN_VARIANTS untuk nama kanonik yang ada."""
+    canonical = set(canonical_names)
+    rows = []
+    for group in KNOWN_VARIANTS:
+        target = next((name for name in group if name in canonical), None)
+        if target is not None:
+            rows += [(name, target) for name in group if name != target]
+    return pd.DataFrame(rows, columns=['Alias', 'Hotel'])
+
+
+class HotelDim:
+    """
+    Tabel dimensi hotel (Hotel_ID, Hotel, Aliases, Room_Available) + lookup alias → kanonik.
+    Lookup memakai Index hash + kode Categorical, jadi pemetaan satu kolom penuh
+    tidak memanggil Python per baris.
+    """
+
+    def __init__(self, capacity_df, aliases_df=None):
+        cap = capacity_df.dropna(subset=['Hotel']).copy()
+        cap['Hotel'] = data_store.normalize_hotel(cap['Hotel'])
+        cap['Room_Available'] = pd.to_numeric(cap['Room_Available'], errors='coerce') \
+            if 'Room_Available' in cap.columns else np.nan
+        cap['Valid_From'] = pd.to_datetime(cap['Valid_From'], errors='coerce').dt.normalize() \
+            if 'Valid_From' in cap.columns else pd.NaT
+        intervals = cap[['Hotel', 'Valid_From', 'Room_Available']]
+        cap = cap.drop_duplicates('Hotel', keep='first').reset_index(drop=True)
+        if 'Hotel_ID' not in cap.columns:
+            cap.insert(0, 'Hotel_ID', np.arange(1, len(cap) + 1))
+        if aliases_df is None:
+            aliases_df = default_aliases(cap['Hotel'])
+        aliases = aliases_df.dropna(subset=['Alias', 'Hotel']).copy()
+        aliases['Alias'] = data_store.normalize_hotel(aliases['Alias'])
+        aliases['Hotel'] = data_store.normalize_hotel(aliases['Hotel'])
+        # Alias ke hotel yang tidak ada di room_capacity.csv diabaikan
+        aliases = aliases[aliases['Hotel'].isin(cap['Hotel']) & (aliases['Alias'] != aliases['Hotel'])]
+
+        alias_lists = aliases.groupby('Hotel')['Alias'].agg(lambda a: '|'.join(sorted(set(a))))
+        self.table = pd.DataFrame({
+            'Hotel_ID': cap['Hotel_ID'].astype('int64'),
+            'Hotel': cap['Hotel'],
+            'Aliases': cap['Hotel'].map(alias_lists).fillna(''),
+        })
+        self.dtype = pd.CategoricalDtype(sorted(self.table['Hotel']))
+
+        # Kunci lookup: nama kanonik sendiri + semua alias (yang pertama menang bila bentrok)
+        names = pd.concat([self.table['Hotel'], aliases['Alias']], ignore_index=True)
+        targets = pd.concat([self.table['Hotel'], aliases['Hotel']], ignore_index=True)
+        keys = _lookup_key(names)
+        first = ~keys.duplicated()
+        self._keys = pd.Index(keys[first])
+        self._target_codes = pd.Categorical(targets[first], dtype=self.dtype).codes
+
+        self._build_capacity(intervals)
+        # Room_Available di tabel dimensi = kapasitas yang berlaku hari ini
+        self.table['Room_Available'] = self.capacity_at(self.table['Hotel'], [pd.Timestamp.today()] * len(self.table))
+
+    def _build_capacity(self, intervals):
+        """Susun interval kapasitas sebagai array kunci terurut (kode hotel, Valid_From) untuk searchsorted."""
+        codes = pd.Categorical(intervals['Hotel'], dtype=self.dtype).codes.astype('int64')
+        days, dated = _epoch_days(intervals['Valid_From'])
+        # Baris tanpa Valid_From = hari 0, selalu di depan interval lain hotel yang sama
+        keys = codes * _DAY_SPAN + np.where(dated, days + _DAY_OFFSET, 0)
+        # Sort stabil; Valid_From sama untuk satu hotel: baris terakhir di file yang menang
+        order = np.argsort(keys, kind='stable')
+        keep = np.append(keys[order][1:] != keys[order][:-1], True) if len(order) else np.array([], dtype=bool)
+        order = order[keep]
+        self._cap_codes = codes[order]
+        self._cap_keys = keys[order]
+        self._cap_values = intervals['Room_Available'].to_numpy(dtype='float64')[order]
+        intervals = intervals.iloc[order].reset_index(drop=True)
+        valid_to = intervals.groupby('Hotel', sort=False)['Valid_From'].shift(-1) - pd.Timedelta(days=1)
+        self.capacity_intervals = intervals.assign(Valid_To=valid_to)[
+            ['Hotel', 'Valid_From', 'Valid_To', 'Room_Available']]
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def names(self):
+        return list(self.dtype.categories)
+
+    def canonicalize(self, hotels):
+        """Series nama/alias → Series Categorical nama kanonik; NaN bila tidak dikenal."""
+        hotels = pd.Series(hotels)
+        idx = self._keys.get_indexer(_lookup_key(hotels))
+        # idx -1 (tidak dikenal) jatuh ke sentinel -1 di akhir array; aman juga untuk dimensi kosong
+        codes = np.append(self._target_codes, -1)[idx]
+        return pd.Series(pd.Categorical.from_codes(codes, dtype=self.dtype), index=hotels.index)
+
+    def resolve(self, hotels):
+        """Seperti canonicalize, tapi nama yang tidak dikenal dikembalikan apa adanya (dinormalisasi)."""
+        hotels = pd.Series(hotels)
+        canonical = self.canonicalize(hotels).astype(object)
+        return canonical.where(canonical.notna(), data_store.normalize_hotel(hotels))
+
+    def rename_map(self, hotels):
+        """{nama lama: nama kanonik} untuk nama di `hotels` yang merupakan alias."""
+        hotels = pd.Series(pd.unique(pd.Series(hotels).dropna()))
+        canonical = self.canonicalize(hotels).astype(object)
+        changed = canonical.notna() & (canonical != hotels)
+        return dict(zip(hotels[changed], canonical[changed]))
+
+    def capacity_at(self, hotels, dates):
+        """
+        Kapasitas yang berlaku untuk setiap pasangan (hotel, malam), sekaligus untuk semua baris:
+        satu searchsorted pada kunci (kode hotel, Valid_From) yang sudah terurut.
+        Return array float64; NaN bila hotel tidak dikenal atau malam sebelum interval pertama.
+        """
+        hotels = pd.Series(hotels)
+        if hotels.dtype != self.dtype:
+            hotels = self.canonicalize(hotels)
+        codes = hotels.cat.codes.to_numpy(dtype='int64')
+        if not len(self._cap_keys):
+            return np.full(len(codes), np.nan)
+        days, valid = _epoch_days(dates)
+        keys = codes * _DAY_SPAN + days + _DAY_OFFSET
+        # Interval terakhir dengan Valid_From <= malam itu; harus milik hotel yang sama
+        pos = np.searchsorted(self._cap_keys, keys, side='right') - 1
+        found = valid & (codes >= 0) & (pos >= 0)
+        pos = np.where(found, pos, 0)
+        found &= self._cap_codes[pos] == codes
+        return np.where(found, self._cap_values[pos], np.nan)
+
+    def capacity(self, hotel, date=None):
+        """Room_Available untuk hotel (atau aliasnya) pada tanggal tertentu (default hari ini); None bila tidak ada."""
+        value = self.capacity_at([hotel], [pd.Timestamp(date) if date is not None else pd.Timestamp.today()])[0]
+        return None if np.isnan(value) else int(value)
+
+
+def add_capacity_change(capacity_path, hotel, valid_from, rooms):
+    """
+    Catat perubahan kapasitas (mis. renovasi) sebagai baris baru di room_capacity.csv,
+    berlaku mulai valid_from sampai perubahan berikutnya. Baris lama tidak diubah.
+    """
+    current = pd.read_csv(capacity_path) if os.path.exists(capacity_path) and os.path.getsize(capacity_path) else \
+        pd.DataFrame(columns=CAPACITY_COLUMNS)
+    for c in CAPACITY_COLUMNS:
+        if c not in current.columns:
+            current[c] = None
+    row = pd.DataFrame([{'Hotel': hotel, 'Room_Available': int(rooms),
+                         'Valid_From': pd.Timestamp(valid_from).strftime('%Y-%m-%d')}])
+    tmp_path = capacity_path + '.tmp'
+    pd.concat([current, row], ignore_index=True).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, capacity_path)
+
+
+def load_dim(data_dir, capacity_df):
+    """
+    HotelDim dari room_capacity.csv (capacity_df) + DATA_DIR/hotel_aliases.csv.
+    File alias dibuat dari KNOWN_VARIANTS bila belum ada, agar tim bisa menambah alias sendiri.
+    """
+    aliases_path = os.path.join(data_dir, ALIASES_FILE)
+    if 'Hotel' not in capacity_df.columns or capacity_df['Hotel'].dropna().empty:
+        return HotelDim(pd.DataFrame(columns=['Hotel', 'Room_Available']))
+    if not os.path.exists(aliases_path):
+        try:
+            default_aliases(data_store.normalize_hotel(capacity_df['Hotel'].dropna())).to_csv(aliases_path, index=False)
+        except OSError:
+            return HotelDim(capacity_df)
+    return HotelDim(capacity_df, data_store.read_csv_cached(aliases_path))
@@ -0,0 +1,272 @@
+# =========================================================
+# ingest.py — Import file upload (CSV/Excel) per chunk
+# =========================================================
+# File dibaca bertahap (CSV: pandas chunksize, xlsx: openpyxl read-only). Tiap chunk bersih
+# ditulis ke folder staging, lalu digabung ke DataStore chunk demi chunk dalam satu
+# transaksi: memori tambahan sebatas satu chunk, berapa pun ukuran upload.
+# Upload multi-file di-parse paralel (worker process), progress dikirim per chunk.
+import os
+import time
+import queue
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+import data_store
+import pools
+
+CHUNK_ROWS = int(os.environ.get('COMPSET_INGEST_CHUNK_ROWS', 50_000))
+# Jumlah proses untuk parse upload multi-file; 1 = berurutan di proses ini
+INGEST_WORKERS = int(os.environ.get('COMPSET_INGEST_WORKERS', min(4, os.cpu_count() or 1)))
+
+
+class MissingColumnsError(ValueError):
+    def __init__(self, missing):
+        # args = (missing,) agar exception tetap utuh saat dikirim balik dari worker process
+        super().__init__(missing)
+        self.missing = missing
+
+    def __str__(self):
+        return f"Kolom wajib hilang pada file upload: {', '.join(self.missing)}"
+
+
+def _iter_csv(path, chunk_rows):
+    size = os.path.getsize(path) or 1
+    with open(path, 'rb') as f:
+        for chunk in pd.read_csv(f, chunksize=chunk_rows):
+            yield chunk, f.tell() / size
+
+
+def _iter_xlsx(path, chunk_rows):
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        total = ws.max_row or 0
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else f'Unnamed: {i}' for i, c in enumerate(header)]
+        n = len(columns)
+        buf, done = [], 0
+        for row in rows:
+            buf.append(tuple(row[:n]) + (None,) * (n - len(row)))
+            if len(buf) >= chunk_rows:
+                # Index lanjut antar chunk seperti read_csv(chunksize=...)
+                yield pd.DataFrame(buf, columns=columns, index=range(done, done + len(buf))), \
+                    (done + len(buf) + 1) / total if total else 0.0
+                done += len(buf)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=columns, index=range(done, done + len(buf))), 1.0
+    finally:
+        wb.close()
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield (chunk DataFrame, progress 0..1) dari file CSV atau xlsx."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return _iter_csv(path, chunk_rows)
+    if ext == '.xlsx':
+        return _iter_xlsx(path, chunk_rows)
+    raise ValueError(f"Format file tidak didukung: {ext}")
+
+
+def validate_frame(df, hotel_dim=None):
+    """
+    Validasi massal sebelum coerce. Return (baris valid, baris ditolak + kolom 'Reason').
+    Ditolak bila: tanggal tidak bisa dibaca, hotel kosong, Room_Available/Room_Sold/ADR
+    kosong, bukan angka atau negatif, Room_Sold > Room_Available, atau (bila hotel_dim
+    diberikan) hotel bukan nama/alias di dimensi hotel. Dengan hotel_dim, nama hotel di
+    baris valid diganti ke nama kanonik dan Room_Available yang kosong diisi kapasitas
+    yang berlaku pada malam itu (room_capacity.csv).
+    """
+    dates = pd.to_datetime(df['Date'], errors='coerce')
+    hotels = data_store.normalize_hotel(df['Hotel'])
+    available = pd.to_numeric(df['Room_Available'], errors='coerce')
+    sold = pd.to_numeric(df['Room_Sold'], errors='coerce')
+    adr = pd.to_numeric(df['ADR'], errors='coerce')
+    canonical = None
+    if hotel_dim is not None and len(hotel_dim):
+        canonical = hotel_dim.canonicalize(df['Hotel'])
+        # Hanya sel yang benar-benar kosong; nilai yang gagal dibaca sebagai angka tetap ditolak
+        raw = df['Room_Available']
+        blank = (raw.isna() | (raw.astype(str).str.strip() == '')).to_numpy()
+        if blank.any():
+            capacity = pd.Series(hotel_dim.capacity_at(canonical, dates), index=df.index)
+            available = available.where(~blank, capacity)
+
+    no_hotel = (df['Hotel'].isna() | (hotels == '')).fillna(True)
+    checks = [
+        (dates.isna(), 'Tanggal tidak valid'),
+        (no_hotel, 'Hotel kosong'),
+        (available.isna() | (available < 0), 'Room_Available kosong/bukan angka/negatif'),
+        (sold.isna() | (sold < 0), 'Room_Sold kosong/bukan angka/negatif'),
+        (adr.isna() | (adr < 0), 'ADR kosong/bukan angka/negatif'),
+        (sold > available, 'Room_Sold > Room_Available'),
+    ]
+    if canonical is not None:
+        checks.append((~no_hotel & canonical.isna(), 'Hotel tidak ada di room_capacity.csv / hotel_aliases.csv'))
+
+    reason = pd.Series('', index=df.index, dtype=object)
+    for mask, label in checks:
+        mask = mask.to_numpy()
+        if mask.any():
+            reason[mask] = reason[mask] + label + '; '
+    bad = (reason != '').to_numpy()
+    rejected = df[bad].assign(Reason=reason[bad].str.rstrip('; '))
+    valid = df[~bad]
+    if canonical is not None:
+        valid = valid.assign(Hotel=canonical[~bad].astype(object), Room_Available=available[~bad])
+    return valid, rejected
+
+
+def parse_file(path, staging_dir, hotel_dim=None, chunk_rows=CHUNK_ROWS, on_progress=None):
+    """
+    Baca, validasi & bersihkan satu file per chunk (tanpa menulis ke store). Tiap chunk
+    bersih (unik per (Date, Hotel) di dalam chunk) langsung ditulis ke staging_dir.
+    Return (list path chunk sesuai urutan, report dict, baris ditolak).
+    MissingColumnsError bila kolom wajib tidak ada di chunk pertama.
+    """
+    started = time.perf_counter()
+    os.makedirs(staging_dir, exist_ok=True)
+    chunk_paths, rejected_parts, rows, merged = [], [], 0, 0
+    for chunk, fraction in iter_chunks(path, chunk_rows):
+        if not rows:
+            missing = [c for c in data_store.REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise MissingColumnsError(missing)
+        rows += len(chunk)
+        valid, rejected = validate_frame(chunk, hotel_dim)
+        clean = data_store.dedupe(data_store.clean_frame(valid))
+        if not clean.empty:
+            chunk_path = os.path.join(staging_dir, f'{len(chunk_paths):05d}.pkl')
+            clean.to_pickle(chunk_path)
+            chunk_paths.append(chunk_path)
+            merged += len(clean)
+        if not rejected.empty:
+            # Nomor baris sesuai file (header = baris 1)
+            rejected_parts.append(rejected.assign(Row=rejected.index + 2))
+        if on_progress is not None:
+            on_progress(min(fraction, 1.0), rows)
+    rejected = pd.concat(rejected_parts) if rejected_parts else pd.DataFrame()
+    report = {
+        'file': os.path.basename(path),
+        'status': 'ok',
+        'rows': rows,
+        # Duplikat dihitung di dalam chunk; key yang sama di chunk lain digabung di store (yang terakhir menang)
+        'merged': merged,
+        'duplicates': rows - len(rejected) - merged,
+        'rejected': len(rejected),
+        'seconds': round(time.perf_counter() - started, 2),
+        'error': '',
+    }
+    return chunk_paths, report, rejected
+
+
+def _parse_in_worker(path, staging_dir, hotel_dim, progress_queue, i):
+    # Progress per chunk dikirim ke proses utama lewat queue (Manager)
+    return parse_file(path, staging_dir, hotel_dim,
+                      on_progress=lambda fraction, rows: progress_queue.put((i, fraction, f'{rows:,} baris')))
+
+
+def _failed_report(path, error):
+    return {'file': os.path.basename(path), 'status': 'failed', 'rows': 0, 'merged': 0, 'duplicates': 0,
+            'rejected': 0, 'seconds': 0.0, 'error': str(error)}
+
+
+def _parse_all(paths, staging_root, hotel_dim, on_progress):
+    """Parse semua file (paralel bila bisa). Return per file: (chunk paths, report, ditolak) atau Exception."""
+    fractions = [0.0] * len(paths)
+
+    def progress(i, fraction, text):
+        fractions[i] = fraction
+        if on_progress is not None:
+            on_progress(sum(fractions) / len(paths), f"{os.path.basename(paths[i])}: {text}")
+
+    staging = [os.path.join(staging_root, f'{i:03d}') for i in range(len(paths))]
+    outcomes = [None] * len(paths)
+    if INGEST_WORKERS > 1 and len(paths) > 1:
+        with multiprocessing.get_context('spawn').Manager() as manager:
+            progress_queue = manager.Queue()
+            futures = {pools.submit_retry('ingest', INGEST_WORKERS, _parse_in_worker,
+                                          path, staging[i], hotel_dim, progress_queue, i): i
+                       for i, path in enumerate(paths)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.2)
+                while True:
+                    try:
+                        progress(*progress_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for future in done:
+                    i = futures[future]
+                    try:
+                        outcomes[i] = future.result()
+                    except BrokenProcessPool:
+                        # Pool rusak di tengah jalan (sudah dibuang oleh pools): file ini di-parse di sini
+                        continue
+                    except Exception as e:
+                        outcomes[i] = e
+                    progress(i, 1.0, 'gagal' if isinstance(outcomes[i], Exception) else 'ok')
+
+    for i, path in enumerate(paths):
+        if outcomes[i] is not None:
+            continue
+        # Chunk sisa worker yang mati tidak dipakai
+        shutil.rmtree(staging[i], ignore_errors=True)
+        try:
+            outcomes[i] = parse_file(path, staging[i], hotel_dim,
+                                     on_progress=lambda fraction, rows, i=i: progress(i, fraction, f'{rows:,} baris'))
+        except Exception as e:
+            outcomes[i] = e
+        progress(i, 1.0, 'gagal' if isinstance(outcomes[i], Exception) else 'ok')
+    return outcomes
+
+
+def ingest_files(store, paths, hotel_dim=None, on_progress=None):
+    """
+    Parse banyak file secara paralel (worker process); tiap chunk bersih ditulis ke folder
+    staging di samping journal. Setelah semua file selesai, chunk dibaca ulang satu per satu
+    dan digabung ke store dalam SATU transaksi (store.upsert_chunks: satu append journal,
+    satu versi data). Bila key yang sama ada di beberapa file, file yang lebih akhir di
+    `paths` yang menang. on_progress(fraction, text) dipanggil per chunk.
+    Return (hasil upsert: inserted/updated/unchanged, list report per file, baris ditolak + kolom File).
+    """
+    staging_root = os.path.dirname(os.path.abspath(store.journal_path))
+    os.makedirs(staging_root, exist_ok=True)
+    staging_root = tempfile.mkdtemp(prefix='ingest-staging-', dir=staging_root)
+    try:
+        chunk_paths, reports, rejected = [], [], []
+        for path, outcome in zip(paths, _parse_all(paths, staging_root, hotel_dim, on_progress)):
+            if isinstance(outcome, Exception):
+                reports.append(_failed_report(path, outcome))
+                continue
+            file_chunks, report, file_rejected = outcome
+            chunk_paths.extend(file_chunks)
+            reports.append(report)
+            if not file_rejected.empty:
+                rejected.append(file_rejected.assign(File=os.path.basename(path)))
+
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if chunk_paths:
+            if on_progress is not None:
+                on_progress(1.0, "Menggabungkan ke database...")
+            result = store.upsert_chunks(pd.read_pickle(p) for p in chunk_paths)
+            # Upload besar bisa membuat journal panjang; gabungkan sekarang, bukan saat rerun berikutnya
+            if store.journal_size() > data_store.JOURNAL_COMPACT_BYTES:
+                store.compact()
+    finally:
+        shutil.rmtree(staging_root, ignore_errors=True)
+    rejected = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame()
+    if not rejected.empty:
+        front = ['File', 'Row', 'Reason']
+        rejected = rejected[front + [c for c in rejected.columns if c not in front]]
+    return result, reports, rejected
@@ -0,0 +1,319 @@
+# =========================================================
+# metrics.py — Agregasi periode & tabel metrik CompSet
+# =========================================================
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from daily_cube import MEASURES, period_bounds, period_starts
+
+# Urutan & nama tabel yang dipakai dashboard dan PDF
+PERIODS = {'Last_Night': 'last', 'Month_to_Date': 'mtd', 'Year_to_Date': 'ytd'}
+# Periode tambahan (tabel opsional & tren): week/quarter-to-date dan rolling N malam ('r<N>')
+EXTRA_PERIODS = {
+    'Week_to_Date': 'wtd',
+    'Quarter_to_Date': 'qtd',
+    'Rolling_7_Days': 'r7',
+    'Rolling_28_Days': 'r28',
+    'Rolling_90_Days': 'r90',
+}
+
+# Jumlah maksimum tabel metrik yang disimpan di LRU cache (per proses)
+METRICS_CACHE_SIZE = int(os.environ.get('COMPSET_METRICS_CACHE_SIZE', 64))
+
+
+def _safe_div(num, den):
+    """Pembagian array-wise; hasil 0 bila penyebut <= 0."""
+    num = np.asarray(num, dtype='float64')
+    den = np.asarray(den, dtype='float64')
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den > 0)
+
+
+def _prepare(df_all):
+    # Nama hotel sudah dinormalisasi & dikanonikkan saat ingest (data_store.clean_frame,
+    # hotels.HotelDim); dtype category dipertahankan untuk groupby
+    df_all = df_all.copy()
+    df_all['Date'] = pd.to_datetime(df_all['Date'], errors='coerce')
+    return df_all
+
+
+def _period_mask(dates, up_to, period):
+    bounds = period_bounds(up_to, period)
+    if bounds is None:
+        return None
+    return (dates >= bounds[0]) & (dates <= bounds[1])
+
+
+def _aggregate(dfp):
+    if dfp.empty:
+        return pd.DataFrame()
+    # ADR tertimbang Room_Sold: sum(Room_Sold * ADR) / sum(Room_Sold), satu groupby vectorized
+    grp = (dfp.assign(_Sold_ADR=dfp['Room_Sold'] * dfp['ADR'])
+              .groupby('Hotel', observed=True)[['Room_Available', 'Room_Sold', '_Sold_ADR']].sum()
+              .reset_index())
+    grp['ADR'] = _safe_div(grp.pop('_Sold_ADR'), grp['Room_Sold'])
+    grp['Revenue'] = grp['Room_Sold'] * grp['ADR']
+    return grp
+
+
+# =========================================================
+# AGGREGATION
+# =========================================================
+def aggregate_period(df_all, up_to_date=None, period='last', cube=None):
+    # Jalur cepat: total periode dari prefix sum DailyCube (O(jumlah hotel))
+    if cube is not None:
+        return cube.period_totals(up_to_date, period)
+    if df_all.empty:
+        return pd.DataFrame()
+    df_all = _prepare(df_all)
+    mask = _period_mask(df_all['Date'], pd.Timestamp(up_to_date), period)
+    if mask is None:
+        return pd.DataFrame()
+    return _aggregate(df_all[mask])
+
+
+def aggregate_range(df_all, start, end, cube=None):
+    """Total per hotel untuk rentang custom [start, end] (inklusif)."""
+    if cube is not None:
+        return cube.range_totals(start, end)
+    if df_all.empty:
+        return pd.DataFrame()
+    df_all = _prepare(df_all)
+    dates = df_all['Date'].dt.normalize()
+    mask = (dates >= pd.Timestamp(start).normalize()) & (dates <= pd.Timestamp(end).normalize())
+    return _aggregate(df_all[mask])
+
+
+# =========================================================
+# METRICS
+# =========================================================
+def metrics_from_aggregate(agg):
+    """Tambahkan Occ%, ARR, RevPAR, RGI/MPI/ARI, Fair_Share, Rank dan baris TOTAL."""
+    if agg.empty:
+        return pd.DataFrame()
+    agg = agg.copy()
+
+    agg['Occ%'] = _safe_div(agg['Room_Sold'] * 100, agg['Room_Available'])
+    agg['ARR'] = agg['ADR']
+    agg['RevPAR'] = _safe_div(agg['Revenue'], agg['Room_Available'])
+
+    total_available = agg['Room_Available'].sum()
+    total_sold = agg['Room_Sold'].sum()
+    total_revenue = agg['Revenue'].sum()
+    total_adr = total_revenue / total_sold if total_sold > 0 else 0
+    total_occ = total_sold / total_available * 100 if total_available > 0 else 0
+    total_revpar = total_revenue / total_available if total_available > 0 else 0
+
+    agg['RGI'] = agg['RevPAR'] / total_revpar * 100 if total_revpar > 0 else 0
+    agg['MPI'] = agg['Occ%'] / total_occ * 100 if total_occ > 0 else 0
+    agg['ARI'] = agg['ADR'] / total_adr * 100 if total_adr > 0 else 0
+    agg['Fair_Share'] = agg['Room_Available'] / total_available if total_available > 0 else 0
+    agg['Rank'] = agg['RevPAR'].rank(ascending=False, method='min').astype(int)
+
+    total_row = pd.DataFrame({
+        'Hotel': ['TOTAL'],
+        'Room_Available': [total_available],
+        'Room_Sold': [total_sold],
+        'ADR': [total_adr],
+        'Revenue': [total_revenue],
+        'Occ%': [total_occ],
+        'ARR': [total_adr],
+        'RevPAR': [total_revpar],
+        'RGI': [100],
+        'MPI': [100],
+        'ARI': [100],
+        'Fair_Share': [1],
+        'Rank': [None]
+    })
+
+    agg = pd.concat([agg, total_row], ignore_index=True)
+    agg = agg.sort_values(by=['Rank'], na_position='last')
+    return agg
+
+
+def compute_metrics_table(df_all, up_to_date, period, cube=None):
+    agg = aggregate_period(df_all, up_to_date=up_to_date, period=period, cube=cube)
+    return metrics_from_aggregate(agg)
+
+
+def compute_range_table(df_all, start, end, cube=None):
+    return metrics_from_aggregate(aggregate_range(df_all, start, end, cube=cube))
+
+
+# =========================================================
+# LRU CACHE
+# =========================================================
+class MetricsCache:
+    """LRU terbatas untuk tabel metrik dengan kunci (data_version, tanggal, period)."""
+
+    def __init__(self, maxsize=METRICS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            table = self._entries.get(key)
+            if table is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return table.copy()
+
+    def put(self, key, table):
+        with self._lock:
+            self._entries[key] = table.copy()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+metrics_cache = MetricsCache()
+
+
+def compute_all_periods(df_all, up_to_date, cube=None, data_version=None):
+    """
+    Satu panggilan untuk Last Night, MTD dan YTD (kunci sesuai PERIODS).
+    Dengan cube: tiga lookup prefix sum. Tanpa cube: data disiapkan & di-scan sekali
+    untuk slice YTD, lalu MTD dan Last Night difilter dari slice YTD yang jauh lebih kecil.
+    Bila data_version diberikan (DataStore.version), hasil disimpan di metrics_cache.
+    """
+    if data_version is not None:
+        day = pd.Timestamp(up_to_date).normalize()
+        keys = {name: (data_version, day, p) for name, p in PERIODS.items()}
+        cached = {name: metrics_cache.get(key) for name, key in keys.items()}
+        if all(t is not None for t in cached.values()):
+            return cached
+        result = compute_all_periods(df_all, up_to_date, cube=cube)
+        for name, key in keys.items():
+            metrics_cache.put(key, result[name])
+        return result
+    if cube is not None:
+        return {name: metrics_from_aggregate(cube.period_totals(up_to_date, p)) for name, p in PERIODS.items()}
+    if df_all.empty:
+        return {name: pd.DataFrame() for name in PERIODS}
+    # Kolom Date tanpa jam: up_to dengan jam (mis. datetime.now()) harus tetap cocok dengan Last Night
+    up_to = pd.Timestamp(up_to_date).normalize()
+    df_all = _prepare(df_all)
+    ytd = df_all[_period_mask(df_all['Date'], up_to, 'ytd')]
+    slices = {
+        'ytd': ytd,
+        'mtd': ytd[ytd['Date'].dt.month == up_to.month],
+        'last': ytd[ytd['Date'] == up_to],
+    }
+    return {name: metrics_from_aggregate(_aggregate(slices[p])) for name, p in PERIODS.items()}
+
+
+# =========================================================
+# BATCH (banyak tanggal sekaligus)
+# =========================================================
+def compute_metrics_batch(cube, dates, period):
+    """
+    Tabel metrik untuk setiap tanggal di `dates` dalam satu pass array (tanpa loop per tanggal).
+    Return frame panjang: kolom Date + kolom compute_metrics_table, termasuk baris TOTAL per tanggal.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+    starts = period_starts(dates, period)
+    if starts is None or not len(dates):
+        return pd.DataFrame()
+    totals = dict(zip(MEASURES, cube.batch_range_totals(starts, dates)))
+    available, sold = totals['Room_Available'], totals['Room_Sold']
+    revenue = np.where(sold > 0, totals['Revenue'], 0.0)
+    present = totals['Rows'] > 0
+
+    adr = _safe_div(revenue, sold)
+    occ = _safe_div(sold * 100, available)
+    revpar = _safe_div(revenue, available)
+
+    # Total compset per tanggal (sel tanpa data bernilai 0, tidak mempengaruhi jumlah)
+    t_available = available.sum(axis=1)
+    t_sold = sold.sum(axis=1)
+    t_revenue = revenue.sum(axis=1)
+    t_adr = _safe_div(t_revenue, t_sold)
+    t_occ = _safe_div(t_sold * 100, t_available)
+    t_revpar = _safe_div(t_revenue, t_available)
+
+    d_idx, h_idx = np.nonzero(present)
+    hotels = np.array(cube.hotels, dtype=object)
+    table = pd.DataFrame({
+        'Date': dates[d_idx],
+        'Hotel': hotels[h_idx],
+        'Room_Available': np.rint(available[d_idx, h_idx]).astype('int64'),
+        'Room_Sold': np.rint(sold[d_idx, h_idx]).astype('int64'),
+        'ADR': adr[d_idx, h_idx],
+        'Revenue': revenue[d_idx, h_idx],
+        'Occ%': occ[d_idx, h_idx],
+        'ARR': adr[d_idx, h_idx],
+        'RevPAR': revpar[d_idx, h_idx],
+        'RGI': _safe_div(revpar * 100, t_revpar[:, None])[d_idx, h_idx],
+        'MPI': _safe_div(occ * 100, t_occ[:, None])[d_idx, h_idx],
+        'ARI': _safe_div(adr * 100, t_adr[:, None])[d_idx, h_idx],
+        'Fair_Share': _safe_div(available, t_available[:, None])[d_idx, h_idx],
+    })
+    table['Rank'] = table.groupby('Date')['RevPAR'].rank(ascending=False, method='min').astype(int)
+
+    has_data = present.any(axis=1)
+    total_rows = pd.DataFrame({
+        'Date': dates[has_data],
+        'Hotel': 'TOTAL',
+        'Room_Available': np.rint(t_available[has_data]).astype('int64'),
+        'Room_Sold': np.rint(t_sold[has_data]).astype('int64'),
+        'ADR': t_adr[has_data],
+        'Revenue': t_revenue[has_data],
+        'Occ%': t_occ[has_data],
+        'ARR': t_adr[has_data],
+        'RevPAR': t_revpar[has_data],
+        'RGI': 100,
+        'MPI': 100,
+        'ARI': 100,
+        'Fair_Share': 1,
+        'Rank': None,
+    })
+    table = pd.concat([table, total_rows], ignore_index=True)
+    return table.sort_values(['Date', 'Rank'], na_position='last', kind='stable').reset_index(drop=True)
+
+
+def metric_trend(cube, dates, period, metric='RGI'):
+    """
+    Deret waktu satu metrik per hotel (mis. RGI rolling 28 malam) untuk semua `dates`
+    dalam satu compute_metrics_batch. Return frame lebar: index Date, kolom Hotel + TOTAL.
+    """
+    table = compute_metrics_batch(cube, dates, period)
+    if table.empty:
+        return pd.DataFrame()
+    return table.pivot(index='Date', columns='Hotel', values=metric)
+
+
+def graphic_summary(table):
+    """
+    Ubah tabel metrik (satu tanggal/periode) ke kolom yang dipakai generate_graphic_pdf:
+    Occupancy, Room_Revenue, MPI/ARI/RGI dan Market_Fair_Share (%), tanpa baris TOTAL.
+    """
+    if table.empty:
+        return pd.DataFrame()
+    summary = table[table['Hotel'] != 'TOTAL']
+    return pd.DataFrame({
+        'Hotel': summary['Hotel'].values,
+        'Room_Available': summary['Room_Available'].values,
+        'Room_Sold': summary['Room_Sold'].values,
+        'Room_Revenue': summary['Revenue'].values,
+        'ADR': summary['ADR'].values,
+        'Occupancy': summary['Occ%'].values,
+        'RevPAR': summary['RevPAR'].values,
+        'MPI': summary['MPI'].values,
+        'ARI': summary['ARI'].values,
+        'RGI': summary['RGI'].values,
+        'Market_Fair_Share': (summary['Fair_Share'] * 100).values,
+    })
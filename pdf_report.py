@@ -5,8 +5,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from datetime import datetime
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-import matplotlib.image as mpimg
+import numpy as np
 import pandas as pd
 import os, sys
 import tempfile
@@ -23,6 +22,71 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+# =========================================================
+# REPORT TEMPLATE (dibuat sekali per proses)
+# =========================================================
+# Logo diperkecil ke ukuran maksimum yang pernah digambar (~200x80 pt di PDF,
+# ~330x115 px di halaman grafik 200 dpi) agar tidak men-decode/embed JPEG 1600 px tiap kali
+LOGO_MAX_PX = (500, 200)
+
+
+class ReportTemplate:
+    """Aset yang sama untuk setiap laporan: logo (decode + downsample), stylesheet dan table style."""
+
+    def __init__(self, logo_path=None):
+        self.logo_path = logo_path
+        self.logo_jpeg = None
+        self.logo_array = None
+        if logo_path:
+            try:
+                from PIL import Image as PILImage
+                with PILImage.open(logo_path) as img:
+                    img = img.convert('RGB')
+                    img.thumbnail(LOGO_MAX_PX)
+                    self.logo_array = np.asarray(img)
+                    # JPEG di-embed reportlab apa adanya (tanpa decode/kompres ulang)
+                    buf = BytesIO()
+                    img.save(buf, format='JPEG', quality=90)
+                self.logo_jpeg = buf.getvalue()
+            except Exception as e:
+                print(f"⚠️ Logo gagal dimuat: {e}")
+
+        self.styles = getSampleStyleSheet()
+        self.styles.add(ParagraphStyle(name='CenterBold', alignment=1, fontSize=14, leading=16, spaceAfter=10))
+        self.styles.add(ParagraphStyle(name='TableHeader', alignment=1, fontSize=10, leading=12, textColor=colors.white))
+        self.styles.add(ParagraphStyle(name='TableCell', alignment=1, fontSize=9, leading=10))
+        self.table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2EC4B6')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7f7f7')]),
+        ])
+
+    def logo_flowable(self, width=200, height=80):
+        # Flowable tidak boleh dipakai ulang antar dokumen; yang di-cache hanya byte JPEG-nya
+        return Image(BytesIO(self.logo_jpeg), width=width, height=height) if self.logo_jpeg else None
+
+
+_templates = {}
+
+
+def get_template(logo_path=None):
+    """ReportTemplate per proses, dibuat ulang hanya bila file logo berubah."""
+    try:
+        mtime = os.path.getmtime(logo_path) if logo_path else None
+    except OSError:
+        logo_path, mtime = None, None
+    key = (logo_path, mtime)
+    template = _templates.get(key)
+    if template is None:
+        template = _templates[key] = ReportTemplate(logo_path)
+    return template
+
+
 # =========================================================
 # MAIN FUNCTION
 # =========================================================
@@ -31,22 +95,19 @@ def generate_pdf_report(summary_data, selected_date, logo_path=None):
     doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), topMargin=30, bottomMargin=30)
     elements = []
 
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='CenterBold', alignment=1, fontSize=14, leading=16, spaceAfter=10))
-    styles.add(ParagraphStyle(name='TableHeader', alignment=1, fontSize=10, leading=12, textColor=colors.white))
-    styles.add(ParagraphStyle(name='TableCell', alignment=1, fontSize=9, leading=10))
+    logo_full = None
+    if logo_path:
+        logo_full = logo_path if os.path.isabs(logo_path) else resource_path(logo_path)
+    template = get_template(logo_full)
+    styles = template.styles
 
     # =========================================================
     # HEADER SECTION
     # =========================================================
-    try:
-        if logo_path:
-            logo_full = logo_path if os.path.isabs(logo_path) else resource_path(logo_path)
-            if os.path.exists(logo_full):
-                elements.append(Image(logo_full, width=200, height=80))
-                elements.append(Spacer(1, 6))
-    except Exception as e:
-        print(f"⚠️ Logo gagal dimuat: {e}")
+    logo = template.logo_flowable()
+    if logo is not None:
+        elements.append(logo)
+        elements.append(Spacer(1, 6))
 
     elements.append(Paragraph("Comparative Statistic Report", styles['CenterBold']))
     elements.append(Paragraph(f"Date: {selected_date.strftime('%d %B %Y')}", styles['CenterBold']))
@@ -58,16 +119,7 @@ def generate_pdf_report(summary_data, selected_date, logo_path=None):
     def build_table(df, title):
         data = [list(df.columns)] + df.values.tolist()
         table = Table(data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2EC4B6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7f7f7')]),
-        ]))
+        table.setStyle(template.table_style)
         elements.append(Paragraph(f"<b>{title}</b>", styles['CenterBold']))
         elements.append(table)
         elements.append(Spacer(1, 12))
@@ -156,145 +208,172 @@ from fpdf import FPDF
 import os
 from datetime import datetime
 
-def generate_graphic_pdf(summary_df, report_date=None, logo_path=None):
+# Ukuran halaman grafik (inch, A4 landscape) dan resolusi render per halaman
+PAGE_SIZE = (11.7, 8.3)
+PAGE_DPI = 200
+
+# Output mode memory: buffer dipindah ke file temp di atas batas ini
+SPOOL_MAX_BYTES = int(os.environ.get('COMPSET_PDF_SPOOL_MB', 20)) * 1024 * 1024
+
+
+def _add_header_footer(fig, header):
+    # Margins and header/footer texts (wider margins for better visual balance)
+    # left/right/top/bottom are fractions of figure from 0..1
+    fig.subplots_adjust(left=0.14, right=0.86, top=0.76, bottom=0.18)
+    # Header area with centered logo + title
+    logo = get_template(header['logo_path']).logo_array
+    if logo is not None:
+        # x, y, w, h in figure coords; place near top center
+        ax_logo = fig.add_axes([0.43, 0.90, 0.14, 0.07])
+        ax_logo.imshow(logo)
+        ax_logo.axis('off')
+    fig.text(0.5, 0.885, header['title'], fontsize=12, fontweight='bold', ha='center', va='top')
+    fig.text(0.99, 0.885, header['right'], fontsize=10, ha='right', va='top')
+    fig.text(0.01, 0.10, header['footer_left'], fontsize=9, ha='left', va='bottom')
+    # Nomor halaman ditulis saat halaman digabung (lihat stitch_graphic_pages)
+
+
+def render_graphic_page(spec, header):
+    """Render satu halaman grafik ke PNG (di report_jobs: satu task pool per halaman)."""
+    fig, ax = plt.subplots(figsize=PAGE_SIZE)
+    ax.bar(spec['hotels'], spec['values'], color=spec['colors'])
+    ax.axhline(spec['line'], color="red", linestyle="--", linewidth=2, label=spec['line_label'])
+    ax.set_title(spec['title'], fontsize=14)
+    ax.set_ylabel(spec['ylabel'])
+    ax.legend()
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    _add_header_footer(fig, header)
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=PAGE_DPI)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def _graphic_page_specs(df, hotels, bar_colors):
+    """Daftar halaman (urut) yang datanya tersedia; halaman tanpa data dilewati di sini."""
+    specs = []
+    # 1) Occupancy chart + garis compset
+    compset_occ = 0.0
+    if df["Room_Available"].sum() > 0:
+        compset_occ = (df["Room_Sold"].sum() / df["Room_Available"].sum()) * 100.0
+    occupancy = df["Occupancy"] if "Occupancy" in df.columns else pd.Series(0.0, index=df.index)
+    specs.append(dict(title="Occupancy vs Compset", ylabel="Occupancy (%)", values=occupancy.tolist(),
+                      line=compset_occ, line_label=f"Compset {compset_occ:.1f}%"))
+    # 2) Revenue chart + garis rata-rata per hotel
+    revenue = df["Room_Revenue"] if "Room_Revenue" in df.columns else pd.Series(0.0, index=df.index)
+    avg_rev = float(revenue.sum()) / max(len(df), 1)
+    specs.append(dict(title="Revenue vs Compset Average", ylabel="Revenue (IDR)", values=revenue.tolist(),
+                      line=avg_rev, line_label=f"Avg {avg_rev:,.0f}"))
+    # 3) Index charts (MPI, ARI, RGI) + garis 100
+    for idx_name in ["MPI", "ARI", "RGI"]:
+        if idx_name in df.columns:
+            specs.append(dict(title=f"{idx_name} (100 = Benchmark)", ylabel="Index", values=df[idx_name].tolist(),
+                              line=100.0, line_label="Benchmark 100"))
+    # 4) Market Fair Share + garis rata-rata 100/len
+    if "Market_Fair_Share" in df.columns and len(df) > 0:
+        avg_fair = 100.0 / len(df)
+        specs.append(dict(title="Market Fair Share (%)", ylabel="%", values=df["Market_Fair_Share"].tolist(),
+                          line=avg_fair, line_label=f"Avg {avg_fair:.1f}%"))
+    for spec in specs:
+        spec['hotels'] = hotels
+        spec['colors'] = bar_colors
+    return specs
+
+
+def stitch_graphic_pages(pages, destination):
+    """Gabungkan PNG halaman sesuai urutan; nomor halaman dihitung dari halaman yang berhasil saja."""
+    width, height = PAGE_SIZE
+    pdf = FPDF(orientation='L', unit='in', format=(height, width))
+    pdf.set_auto_page_break(False)
+    pdf.set_font('Helvetica', size=9)
+    page_no = 0
+    for png in pages:
+        if not png:
+            continue
+        page_no += 1
+        pdf.add_page()
+        pdf.image(BytesIO(png), x=0, y=0, w=width, h=height)
+        # Posisi sama dengan footer kanan versi matplotlib (x=0.99, y=0.10 dari bawah)
+        pdf.set_xy(0, height * 0.90 - 0.2)
+        pdf.cell(width * 0.99, 0.2, f"Page {page_no}", align='R')
+    # destination: path file atau objek file biner
+    pdf.output(destination)
+    return page_no
+
+
+def graphic_page_plan(summary_df, report_date=None, logo_path=None):
+    """Return (specs, header): halaman grafik sesuai urutan dan header/footer yang sama untuk semua halaman."""
+    # Siapkan data
+    df = summary_df.fillna(0).copy()
+    hotels = df.get("Hotel", pd.Series([f"H{i+1}" for i in range(len(df))])).tolist()
+
+    printed_at = datetime.now()
+
+    # Resolve logo path if not provided
+    if not logo_path:
+        candidate = resource_path("Daun_logo.jpg")
+        logo_candidate = candidate if os.path.exists(candidate) else None
+    else:
+        logo_candidate = logo_path if os.path.exists(logo_path) else None
+
+    header = {
+        'title': "Comparative Graphic Report",
+        'right': f"Report Date: {report_date.strftime('%d %b %Y') if report_date else '-'}",
+        'footer_left': f"Printed: {printed_at.strftime('%d %b %Y %H:%M:%S')}",
+        'logo_path': logo_candidate,
+    }
+
+    cmap = plt.get_cmap('tab10')
+    special_colors = {
+        "Daun Bali Seminyak": "#10B981",  # emerald/green
+        "Daun Bali Seminyak Hotel": "#10B981",
+        "Kamania Hotel Petitenget": "#EF4444",  # red
+        "Kamanya Petitenget": "#EF4444",
+    }
+    def _color_for(h):
+        return special_colors.get(h, cmap((hotels.index(h)) % 10))
+    bar_colors = [_color_for(h) for h in hotels]
+
+    return _graphic_page_specs(df, hotels, bar_colors), header
+
+
+def generate_graphic_pdf(summary_df, report_date=None, logo_path=None, output="memory", output_dir=None):
+    """
+    Render semua halaman berurutan di proses ini (job UI di report_jobs merender
+    halaman paralel di pool render, lalu menggabungkannya dengan stitch_graphic_pages).
+    output="memory" (default): return buffer file-like di posisi 0 — di memori, dan baru
+    dipindah ke file temp bila melebihi SPOOL_MAX_BYTES. Tidak ada file yang tertinggal.
+    output="file": tulis ke output_dir (default ~/Downloads)/graphic_report_<ts>.pdf dan return path-nya.
+    """
     try:
-        # Pastikan folder tujuan ada dan bisa ditulis (Downloads)
-        output_folder = os.path.expanduser("~/Downloads")
-        os.makedirs(output_folder, exist_ok=True)
-
-        # Buat nama file unik
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        pdf_path = os.path.join(output_folder, f"graphic_report_{timestamp}.pdf")
-
-        # Siapkan data
-        df = summary_df.fillna(0).copy()
-        hotels = df.get("Hotel", pd.Series([f"H{i+1}" for i in range(len(df))])).tolist()
-
-        printed_at = datetime.now()
-
-        # Resolve logo path if not provided
-        if not logo_path:
-            candidate = resource_path("Daun_logo.jpg")
-            logo_candidate = candidate if os.path.exists(candidate) else None
+        if output == "file":
+            # Pastikan folder tujuan ada dan bisa ditulis (Downloads)
+            output_folder = output_dir or os.path.expanduser("~/Downloads")
+            os.makedirs(output_folder, exist_ok=True)
+
+            # Buat nama file unik
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            destination = os.path.join(output_folder, f"graphic_report_{timestamp}.pdf")
         else:
-            logo_candidate = logo_path if os.path.exists(logo_path) else None
-
-        def add_header_footer(fig, title, page_no):
-            # Margins and header/footer texts (wider margins for better visual balance)
-            # left/right/top/bottom are fractions of figure from 0..1
-            fig.subplots_adjust(left=0.14, right=0.86, top=0.76, bottom=0.18)
-            header_title = "Comparative Graphic Report"
-            header_right = f"Report Date: {report_date.strftime('%d %b %Y') if report_date else '-'}"
-            footer_left = f"Printed: {printed_at.strftime('%d %b %Y %H:%M:%S')}"
-            footer_right = f"Page {page_no}"
-            # Header area with centered logo + title
-            if logo_candidate:
-                try:
-                    img = mpimg.imread(logo_candidate)
-                    # x, y, w, h in figure coords; place near top center
-                    ax_logo = fig.add_axes([0.43, 0.90, 0.14, 0.07])
-                    ax_logo.imshow(img)
-                    ax_logo.axis('off')
-                except Exception:
-                    pass
-            fig.text(0.5, 0.885, header_title, fontsize=12, fontweight='bold', ha='center', va='top')
-            fig.text(0.99, 0.885, header_right, fontsize=10, ha='right', va='top')
-            fig.text(0.01, 0.10, footer_left, fontsize=9, ha='left', va='bottom')
-            fig.text(0.99, 0.10, footer_right, fontsize=9, ha='right', va='bottom')
-
-        cmap = plt.get_cmap('tab10')
-        special_colors = {
-            "Daun Bali Seminyak": "#10B981",  # emerald/green
-            "Daun Bali Seminyak Hotel": "#10B981",
-            "Kamania Hotel Petitenget": "#EF4444",  # red
-            "Kamanya Petitenget": "#EF4444",
-        }
-        def _color_for(h):
-            return special_colors.get(h, cmap((hotels.index(h)) % 10))
-        bar_colors = [_color_for(h) for h in hotels]
-
-        page_no = 1
-        with PdfPages(pdf_path) as pdf:
-            # 1) Occupancy chart + garis compset
-            try:
-                compset_occ = 0.0
-                if df["Room_Available"].sum() > 0:
-                    compset_occ = (df["Room_Sold"].sum() / df["Room_Available"].sum()) * 100.0
-                fig, ax = plt.subplots(figsize=(11.7, 8.3))  # A4 landscape-ish in inches
-                ax.bar(hotels, df.get("Occupancy", 0.0), color=bar_colors)
-                ax.axhline(compset_occ, color="red", linestyle="--", linewidth=2, label=f"Compset {compset_occ:.1f}%")
-                ax.set_title("Occupancy vs Compset", fontsize=14)
-                ax.set_ylabel("Occupancy (%)")
-                ax.legend()
-                plt.xticks(rotation=45, ha='right')
-                add_header_footer(fig, "Occupancy vs Compset", page_no)
-                pdf.savefig(fig)
-                plt.close(fig)
-                page_no += 1
-            except Exception:
-                pass
-
-            # 2) Revenue chart + garis rata-rata per hotel
-            try:
-                avg_rev = float(df.get("Room_Revenue", 0.0).sum()) / max(len(df), 1)
-                fig, ax = plt.subplots(figsize=(11.7, 8.3))
-                ax.bar(hotels, df.get("Room_Revenue", 0.0), color=bar_colors)
-                ax.axhline(avg_rev, color="red", linestyle="--", linewidth=2, label=f"Avg {avg_rev:,.0f}")
-                ax.set_title("Revenue vs Compset Average", fontsize=14)
-                ax.set_ylabel("Revenue (IDR)")
-                ax.legend()
-                plt.xticks(rotation=45, ha='right')
-                add_header_footer(fig, "Revenue vs Compset Average", page_no)
-                pdf.savefig(fig)
-                plt.close(fig)
-                page_no += 1
-            except Exception:
-                pass
-
-            # 3) Index charts (MPI, ARI, RGI) + garis 100
-            try:
-                for idx_name, color in [("MPI", "#6366F1"), ("ARI", "#F59E0B"), ("RGI", "#EF4444")]:
-                    if idx_name in df.columns:
-                        fig, ax = plt.subplots(figsize=(11.7, 8.3))
-                        ax.bar(hotels, df[idx_name], color=bar_colors)
-                        ax.axhline(100.0, color="red", linestyle="--", linewidth=2, label="Benchmark 100")
-                        ax.set_title(f"{idx_name} (100 = Benchmark)", fontsize=14)
-                        ax.set_ylabel("Index")
-                        ax.legend()
-                        plt.xticks(rotation=45, ha='right')
-                        add_header_footer(fig, f"{idx_name} (100 = Benchmark)", page_no)
-                        pdf.savefig(fig)
-                        plt.close(fig)
-                        page_no += 1
-            except Exception:
-                pass
-
-            # 4) Market Fair Share + garis rata-rata 100/len
+            destination = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+
+        specs, header = graphic_page_plan(summary_df, report_date=report_date, logo_path=logo_path)
+        pages = []
+        for spec in specs:
             try:
-                if "Market_Fair_Share" in df.columns and len(df) > 0:
-                    avg_fair = 100.0 / len(df)
-                    fig, ax = plt.subplots(figsize=(11.7, 8.3))
-                    ax.bar(hotels, df["Market_Fair_Share"], color=bar_colors)
-                    ax.axhline(avg_fair, color="red", linestyle="--", linewidth=2, label=f"Avg {avg_fair:.1f}%")
-                    ax.set_title("Market Fair Share (%)", fontsize=14)
-                    ax.set_ylabel("%")
-                    ax.legend()
-                    plt.xticks(rotation=45, ha='right')
-                    add_header_footer(fig, "Market Fair Share (%)", page_no)
-                    pdf.savefig(fig)
-                    plt.close(fig)
-                    page_no += 1
-            except Exception:
-                pass
-
-        return pdf_path
+                pages.append(render_graphic_page(spec, header))
+            except Exception as e:
+                print(f"⚠️ Halaman '{spec['title']}' gagal dirender: {e}")
+                pages.append(None)
+
+        stitch_graphic_pages(pages, destination)
+        if output == "file":
+            return destination
+        destination.seek(0)
+        return destination
 
     except Exception as e:
         print("❌ Gagal membuat PDF alternatif:", e)
         import traceback
         traceback.print_exc()
         return None
-
-
-
-
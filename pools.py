@@ -0,0 +1,58 @@
+# =========================================================
+# pools.py — Process pool bersama per nama (render PDF, ingest, ...)
+# =========================================================
+# Pool dipertahankan per proses: biaya start worker (import pandas/matplotlib) hanya
+# dibayar sekali. Worker yang crash / di-OOM-kill membuat pool rusak permanen; pool
+# seperti itu dibuang di sini dan dibuat ulang saat dipakai lagi.
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(name, workers):
+    """Pool bernama `name`; dibuat (spawn, `workers` proses) saat pertama kali dipakai."""
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            # spawn: jangan fork proses Streamlit yang multi-thread
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pools[name] = pool
+        return pool
+
+
+def reset_pool(name, pool=None):
+    """Buang pool `name`. Dengan `pool`: hanya bila itu masih pool aktif (belum diganti thread lain)."""
+    with _lock:
+        current = _pools.get(name)
+        if current is None or (pool is not None and current is not pool):
+            return
+        del _pools[name]
+    current.shutdown(wait=False, cancel_futures=True)
+
+
+def _reset_if_broken(name, pool):
+    def callback(future):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            reset_pool(name, pool)
+    return callback
+
+
+def submit_retry(name, workers, fn, *args):
+    """
+    Submit ke pool `name`; bila pool sudah rusak, pool dibuat ulang dan submit dicoba sekali
+    lagi. Future yang kemudian gagal dengan BrokenProcessPool juga membuang pool-nya, jadi
+    pemanggil cukup menangkap BrokenProcessPool dari result() (mis. untuk fallback di proses ini).
+    """
+    pool = get_pool(name, workers)
+    try:
+        future = pool.submit(fn, *args)
+    except BrokenProcessPool:
+        reset_pool(name, pool)
+        pool = get_pool(name, workers)
+        future = pool.submit(fn, *args)
+    future.add_done_callback(_reset_if_broken(name, pool))
+    return future
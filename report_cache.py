@@ -0,0 +1,97 @@
+# =========================================================
+# report_cache.py — Cache artefak PDF di disk (content-addressed)
+# =========================================================
+import os
+import time
+import hashlib
+import threading
+
+import pandas as pd
+
+# Naikkan bila layout PDF berubah agar artefak lama tidak dipakai lagi
+ARTIFACT_VERSION = 1
+
+MAX_CACHE_BYTES = int(os.environ.get('COMPSET_PDF_CACHE_MB', 200)) * 1024 * 1024
+MAX_CACHE_AGE = float(os.environ.get('COMPSET_PDF_CACHE_DAYS', 30)) * 24 * 3600
+
+
+def _hash_file(h, path):
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                h.update(block)
+
+
+def artifact_key(kind, summary_data, report_date, logo_path=None):
+    """
+    Hash SHA-256 dari isi tabel ringkasan + tanggal laporan + byte logo.
+    Tabel yang sama untuk tanggal yang sama selalu menghasilkan kunci yang sama.
+    """
+    h = hashlib.sha256()
+    h.update(f'{kind}:v{ARTIFACT_VERSION}:{pd.Timestamp(report_date).date().isoformat()}'.encode())
+    if isinstance(summary_data, pd.DataFrame):
+        summary_data = {'summary': summary_data}
+    for name, table in summary_data.items():
+        h.update(f'\n#{name}\n'.encode())
+        h.update(table.to_csv(index=False).encode('utf-8'))
+    _hash_file(h, logo_path)
+    return h.hexdigest()
+
+
+class PdfArtifactCache:
+    """Direktori berisi <hash>.pdf; dievict berdasarkan umur lalu total ukuran (yang paling lama dipakai dulu)."""
+
+    def __init__(self, cache_dir, max_bytes=MAX_CACHE_BYTES, max_age=MAX_CACHE_AGE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pdf')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        # Tandai baru dipakai (mtime dipakai sebagai urutan LRU saat evict)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            now = time.time()
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.pdf'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if now - st.st_mtime > self.max_age:
+                    os.remove(path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
@@ -0,0 +1,193 @@
+# =========================================================
+# report_jobs.py — Render PDF di background (process pool)
+# =========================================================
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import Future
+
+import pools
+
+# Batas concurrency: jumlah proses render dan jumlah job aktif (antri + jalan)
+MAX_WORKERS = int(os.environ.get('COMPSET_PDF_WORKERS', 2))
+MAX_ACTIVE_JOBS = int(os.environ.get('COMPSET_PDF_MAX_JOBS', 8))
+# Job selesai disimpan di memori selama ini (detik) agar bisa diunduh
+JOB_TTL = 3600
+
+_jobs = {}
+_lock = threading.Lock()
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind, file_name, future, meta=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.file_name = file_name
+        self.future = future
+        self.meta = meta or {}
+        self.submitted_at = time.time()
+        self.finished_at = None
+        # Waktu selesai dicatat saat future selesai, bukan saat status pertama kali di-poll
+        future.add_done_callback(self._mark_finished)
+
+    def _mark_finished(self, future):
+        self.finished_at = time.time()
+
+    @property
+    def status(self):
+        if self.future.done():
+            return 'failed' if self.future.cancelled() or self.future.exception() else 'done'
+        if self.future.running():
+            return 'running'
+        return 'queued'
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.submitted_at
+
+    @property
+    def error(self):
+        if self.status != 'failed':
+            return None
+        return self.future.exception() if not self.future.cancelled() else 'cancelled'
+
+    def result(self):
+        return self.future.result() if self.status == 'done' else None
+
+
+# =========================================================
+# WORKER FUNCTIONS (jalan di proses terpisah)
+# =========================================================
+def _render_comparative(summary_data, report_date, logo_path):
+    from pdf_report import generate_pdf_report
+    buffer = generate_pdf_report(summary_data, report_date, logo_path=logo_path)
+    return buffer.getvalue() if buffer is not None else None
+
+
+def _render_graphic(summary_df, report_date, logo_path):
+    # Satu laporan utuh di satu proses (batch_reports); job UI memakai _submit_graphic
+    from pdf_report import generate_graphic_pdf
+    buffer = generate_graphic_pdf(summary_df, report_date=report_date, logo_path=logo_path)
+    if buffer is None:
+        raise RuntimeError('generate_graphic_pdf gagal membuat PDF')
+    with buffer:
+        return buffer.read()
+
+
+def _plan_graphic(summary_df, report_date, logo_path):
+    from pdf_report import graphic_page_plan
+    return graphic_page_plan(summary_df, report_date=report_date, logo_path=logo_path)
+
+
+def _render_graphic_page(spec, header):
+    from pdf_report import render_graphic_page
+    return render_graphic_page(spec, header)
+
+
+def _stitch_graphic(pages):
+    from io import BytesIO
+    from pdf_report import stitch_graphic_pages
+    buffer = BytesIO()
+    stitch_graphic_pages(pages, buffer)
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    'comparative': _render_comparative,
+    'graphic': _render_graphic,
+}
+
+
+# =========================================================
+# API
+# =========================================================
+def _submit(fn, *args):
+    return pools.submit_retry('report', MAX_WORKERS, fn, *args)
+
+
+def _submit_graphic(summary_df, report_date, logo_path):
+    """
+    Graphic PDF sebagai beberapa task di pool render: rencana halaman, satu task per
+    halaman (paralel, tetap dibatasi MAX_WORKERS), lalu stitch sesuai urutan halaman
+    setelah halaman terakhir selesai. Return Future untuk bytes PDF-nya.
+    Halaman yang gagal dilewati (nomor halaman tetap urut); gagal semua = job gagal.
+    """
+    job_future = Future()
+
+    def fail(exc):
+        if not job_future.done():
+            job_future.set_exception(exc)
+
+    def on_stitched(future):
+        try:
+            job_future.set_result(future.result())
+        except Exception as e:
+            fail(e)
+
+    def on_plan(future):
+        try:
+            specs, header = future.result()
+            if not specs:
+                raise RuntimeError('Tidak ada halaman grafik untuk dirender')
+            # Task pertama sudah diambil worker: job tidak lagi 'queued'
+            job_future.set_running_or_notify_cancel()
+            pages = [None] * len(specs)
+            remaining = [len(specs)]
+            lock = threading.Lock()
+
+            def on_page(i, page_future):
+                try:
+                    error = 'cancelled' if page_future.cancelled() else page_future.exception()
+                    if error is None:
+                        pages[i] = page_future.result()
+                    else:
+                        print(f"⚠️ Halaman '{specs[i]['title']}' gagal dirender: {error}")
+                    with lock:
+                        remaining[0] -= 1
+                        if remaining[0]:
+                            return
+                    if not any(pages):
+                        raise RuntimeError('Semua halaman grafik gagal dirender')
+                    _submit(_stitch_graphic, pages).add_done_callback(on_stitched)
+                except Exception as e:
+                    fail(e)
+
+            for i, spec in enumerate(specs):
+                _submit(_render_graphic_page, spec, header).add_done_callback(lambda f, i=i: on_page(i, f))
+        except Exception as e:
+            fail(e)
+
+    _submit(_plan_graphic, summary_df, report_date, logo_path).add_done_callback(on_plan)
+    return job_future
+
+
+def _prune():
+    now = time.time()
+    for job_id in [j.id for j in _jobs.values() if j.future.done() and now - j.submitted_at > JOB_TTL]:
+        del _jobs[job_id]
+
+
+def active_jobs():
+    return sum(1 for j in _jobs.values() if not j.future.done())
+
+
+def submit(kind, *args, file_name='report.pdf', meta=None):
+    """Kirim job render ke process pool. Return job id; JobQueueFull bila batas job aktif tercapai."""
+    with _lock:
+        _prune()
+        if active_jobs() >= MAX_ACTIVE_JOBS:
+            raise JobQueueFull(f'Maksimal {MAX_ACTIVE_JOBS} job PDF aktif, coba lagi sebentar.')
+        future = _submit_graphic(*args) if kind == 'graphic' else _submit(RENDERERS[kind], *args)
+        job = Job(kind, file_name, future, meta=meta)
+        _jobs[job.id] = job
+        return job.id
+
+
+def get(job_id):
+    with _lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,177 @@
+# =========================================================
+# test_data_store.py — KeyedFrame / DataStore vs dict referensi
+# =========================================================
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+
+HOTELS = ['Daun Bali Seminyak', 'Kamania Hotel Petitenget', 'Hotel  A', 'Hotel B']
+DATES = pd.date_range('2025-01-28', periods=12, freq='D')
+
+
+def make_store(tmp_path, backend):
+    if backend == 'parquet':
+        storage = data_store.ParquetBackend(str(tmp_path / 'comparative_data'))
+    else:
+        storage = data_store.CsvBackend(str(tmp_path / 'comparative_data.csv'))
+    return data_store.DataStore(storage, str(tmp_path / 'comparative_data.journal.csv'))
+
+
+def random_row(rng):
+    available = int(rng.integers(50, 200))
+    return {
+        'Date': DATES[int(rng.integers(len(DATES)))],
+        'Hotel': HOTELS[int(rng.integers(len(HOTELS)))],
+        'Room_Available': available,
+        'Room_Sold': int(rng.integers(0, available + 1)),
+        'ADR': float(rng.choice([750_000.0, 812_500.5, 1_000_000.0])),
+    }
+
+
+def ref_key(row):
+    return pd.Timestamp(row['Date']), ' '.join(row['Hotel'].split())
+
+
+def ref_values(row):
+    return int(row['Room_Available']), int(row['Room_Sold']), float(row['ADR'])
+
+
+def frame_as_dict(df):
+    keys = list(zip(pd.to_datetime(df['Date']), df['Hotel'].astype(object)))
+    assert len(keys) == len(set(keys)), 'primary key (Date, Hotel) dobel'
+    values = zip(df['Room_Available'].astype(int), df['Room_Sold'].astype(int), df['ADR'].astype(float))
+    assert np.allclose(df['Room_Revenue'], df['Room_Sold'] * df['ADR'])
+    return dict(zip(keys, values))
+
+
+@pytest.mark.parametrize('backend', ['parquet', 'csv'])
+@pytest.mark.parametrize('seed', range(3))
+def test_random_operations_match_reference(tmp_path, backend, seed):
+    rng = np.random.default_rng(seed)
+    store = make_store(tmp_path, backend)
+    reference = {}
+    for step in range(150):
+        op = rng.choice(['upsert', 'upsert', 'upsert', 'delete', 'frame', 'compact', 'reload'],
+                        p=[0.2, 0.2, 0.2, 0.2, 0.1, 0.05, 0.05])
+        if op == 'upsert':
+            row = random_row(rng)
+            key = ref_key(row)
+            expected = ('inserted' if key not in reference else
+                        'unchanged' if reference[key] == ref_values(row) else 'updated')
+            assert store.upsert_row(row) == expected
+            reference[key] = ref_values(row)
+        elif op == 'delete':
+            row = random_row(rng)
+            key = ref_key(row)
+            assert store.delete(row['Date'], row['Hotel']) == (key in reference)
+            reference.pop(key, None)
+        elif op == 'frame':
+            rows = [random_row(rng) for _ in range(int(rng.integers(1, 8)))]
+            latest = {ref_key(r): ref_values(r) for r in rows}
+            inserted = sum(k not in reference for k in latest)
+            unchanged = sum(reference.get(k) == v for k, v in latest.items())
+            result = store.upsert_frame(pd.DataFrame(rows))
+            assert result == {'inserted': inserted, 'updated': len(latest) - inserted - unchanged,
+                              'unchanged': unchanged}
+            reference.update(latest)
+        elif op == 'compact':
+            store.compact()
+        else:
+            # Instance baru di atas file yang sama: storage utama + replay journal
+            store = make_store(tmp_path, backend)
+        assert frame_as_dict(store.frame) == reference, f'step {step}: {op}'
+    assert frame_as_dict(make_store(tmp_path, backend).load()) == reference
+
+
+def test_loaded_frame_is_not_mutated_by_writes(tmp_path):
+    store = make_store(tmp_path, 'parquet')
+    rows = [{'Date': d, 'Hotel': h, 'Room_Available': 100, 'Room_Sold': 50, 'ADR': 800_000.0}
+            for d in DATES[:3] for h in HOTELS[:2]]
+    store.upsert_frame(pd.DataFrame(rows))
+    before = store.load()
+    snapshot = before.copy()
+
+    assert store.upsert_row(dict(rows[0], Room_Sold=90)) == 'updated'
+    assert store.delete(rows[1]['Date'], rows[1]['Hotel'])
+    assert store.upsert_row(dict(rows[2], Hotel=HOTELS[3])) == 'inserted'
+    store.upsert_frame(pd.DataFrame([dict(rows[3], ADR=900_000.0)]))
+
+    pd.testing.assert_frame_equal(before, snapshot)
+    after = frame_as_dict(store.frame)
+    assert after[ref_key(rows[0])] == (100, 90, 800_000.0)
+    assert ref_key(rows[1]) not in after
+    assert after[ref_key(rows[3])] == (100, 50, 900_000.0)
+    assert len(after) == len(rows)
+
+
+def test_delete_then_reinsert(tmp_path):
+    store = make_store(tmp_path, 'parquet')
+    row = {'Date': DATES[0], 'Hotel': HOTELS[0], 'Room_Available': 100, 'Room_Sold': 50, 'ADR': 800_000.0}
+    assert store.upsert_row(row) == 'inserted'
+    store.frame
+    assert store.delete(row['Date'], row['Hotel'])
+    assert not store.delete(row['Date'], row['Hotel'])
+    assert store.upsert_row(dict(row, Room_Sold=60)) == 'inserted'
+    assert frame_as_dict(store.frame) == {ref_key(row): (100, 60, 800_000.0)}
+    assert frame_as_dict(make_store(tmp_path, 'parquet').load()) == {ref_key(row): (100, 60, 800_000.0)}
+
+
+def test_upsert_frame_last_duplicate_wins(tmp_path):
+    store = make_store(tmp_path, 'parquet')
+    base = {'Date': DATES[0], 'Hotel': HOTELS[0], 'Room_Available': 100, 'Room_Sold': 50, 'ADR': 800_000.0}
+    assert store.upsert_frame(pd.DataFrame([base])) == {'inserted': 1, 'updated': 0, 'unchanged': 0}
+    batch = pd.DataFrame([dict(base, Room_Sold=70), dict(base, Hotel='  Daun Bali   Seminyak '), base])
+    assert store.upsert_frame(batch) == {'inserted': 0, 'updated': 0, 'unchanged': 1}
+    assert frame_as_dict(store.frame) == {ref_key(base): (100, 50, 800_000.0)}
+
+
+def test_upsert_chunks_single_transaction(tmp_path):
+    store = make_store(tmp_path, 'parquet')
+    base = pd.DataFrame([{'Date': d, 'Hotel': HOTELS[0], 'Room_Available': 100, 'Room_Sold': 50, 'ADR': 800_000.0}
+                         for d in DATES[:4]])
+    store.upsert_frame(base)
+    version = store.version
+    journal_rows = len(pd.read_csv(store.journal_path))
+
+    def chunk(rows):
+        return data_store.dedupe(data_store.clean_frame(pd.DataFrame(rows)))
+
+    first = base.iloc[0].to_dict()
+    second = base.iloc[1].to_dict()
+    new = dict(first, Hotel=HOTELS[1])
+    chunks = [
+        chunk([dict(first, Room_Sold=60), dict(second, Room_Sold=70), new]),
+        # Key yang sama di chunk berikutnya menang: first kembali ke nilai lama, new ditimpa
+        chunk([first, dict(new, Room_Sold=10)]),
+    ]
+    assert store.upsert_chunks(iter(chunks)) == {'inserted': 1, 'updated': 1, 'unchanged': 1}
+    assert store.version == version + 1
+
+    expected = {ref_key(r): ref_values(r) for r in base.to_dict('records')}
+    expected[ref_key(second)] = (100, 70, 800_000.0)
+    expected[ref_key(new)] = (100, 10, 800_000.0)
+    assert frame_as_dict(store.frame) == expected
+    assert frame_as_dict(make_store(tmp_path, 'parquet').load()) == expected
+    # Hanya hasil akhir yang berubah yang masuk journal (second + new)
+    assert len(pd.read_csv(store.journal_path)) == journal_rows + 2
+
+
+def test_upsert_chunks_failure_leaves_store_untouched(tmp_path):
+    store = make_store(tmp_path, 'parquet')
+    base = pd.DataFrame([{'Date': DATES[0], 'Hotel': HOTELS[0], 'Room_Available': 100, 'Room_Sold': 50,
+                          'ADR': 800_000.0}])
+    store.upsert_frame(base)
+    before = store.frame
+    journal_before = store.journal_size()
+
+    def chunks():
+        yield data_store.clean_frame(base.assign(Room_Sold=90, Hotel=HOTELS[1]))
+        raise OSError('disk penuh')
+
+    with pytest.raises(OSError):
+        store.upsert_chunks(chunks())
+    assert store.journal_size() == journal_before
+    assert frame_as_dict(store.frame) == frame_as_dict(before)
+    assert not [f for f in (tmp_path).iterdir() if f.name.endswith('.staging')]
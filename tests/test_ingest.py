@@ -0,0 +1,49 @@
+# =========================================================
+# test_ingest.py — upload multi-file: staging per chunk, satu transaksi
+# =========================================================
+import os
+
+import pandas as pd
+import pytest
+
+import data_store
+import ingest
+
+DATES = pd.date_range('2025-03-01', periods=5, freq='D').strftime('%Y-%m-%d')
+
+
+def rows(hotel, dates, sold):
+    return [{'Date': d, 'Hotel': hotel, 'Room_Available': 100, 'Room_Sold': sold, 'ADR': 750_000.0} for d in dates]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_ingest_files_later_file_wins(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(ingest, 'INGEST_WORKERS', workers)
+    upload = tmp_path / 'uploads'
+    upload.mkdir()
+    pd.DataFrame(rows('Hotel A', DATES, 40)).to_csv(upload / 'a.csv', index=False)
+    # Overlap 2 malam dengan a.csv + satu baris tidak valid (Room_Sold > Room_Available)
+    pd.DataFrame(rows('Hotel A', DATES[3:], 55) + rows('Hotel B', DATES[:1], 150)) \
+        .to_csv(upload / 'b.csv', index=False)
+    pd.DataFrame({'Date': DATES[:1]}).to_csv(upload / 'bad.csv', index=False)
+    paths = [str(upload / name) for name in ['a.csv', 'bad.csv', 'b.csv']]
+
+    store = data_store.DataStore(data_store.ParquetBackend(str(tmp_path / 'comparative_data')),
+                                 str(tmp_path / 'comparative_data.journal.csv'))
+    store.load()
+    version = store.version
+    progress = []
+    result, reports, rejected = ingest.ingest_files(store, paths, on_progress=lambda f, text: progress.append(f))
+
+    assert result == {'inserted': 5, 'updated': 0, 'unchanged': 0}
+    assert [r['status'] for r in reports] == ['ok', 'failed', 'ok']
+    assert 'Room_Available' in reports[1]['error']
+    assert (reports[2]['rows'], reports[2]['merged'], reports[2]['rejected']) == (3, 2, 1)
+    assert rejected['File'].tolist() == ['b.csv']
+    assert store.version == version + 1
+
+    frame = store.frame.sort_values('Date')
+    assert frame['Room_Sold'].tolist() == [40, 40, 40, 55, 55]
+    assert progress and progress[-1] == 1.0
+    # Folder staging dibersihkan
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('ingest-staging-')]
@@ -0,0 +1,130 @@
+# =========================================================
+# test_metrics.py — aggregate_period vectorized vs versi lama (lambda per grup)
+# =========================================================
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+import metrics
+from daily_cube import DailyCube
+
+PERIODS = ['last', 'mtd', 'ytd']
+# Cube menghitung total sebagai selisih prefix sum sepanjang history: error pembulatan
+# relatif sedikit lebih besar (masih jauh di bawah 1 sen pada ADR rupiah)
+CUBE_RTOL = 1e-9
+
+
+def reference_aggregate_period(df_all, up_to_date=None, period='last'):
+    """aggregate_period sebelum vectorisasi (ADR lewat lambda per grup), sebagai pembanding."""
+    if df_all.empty:
+        return pd.DataFrame()
+    df_all = df_all.copy()
+    df_all['Date'] = pd.to_datetime(df_all['Date'], errors='coerce')
+    if 'Hotel' in df_all.columns:
+        df_all['Hotel'] = df_all['Hotel'].astype(str).apply(lambda x: ' '.join(x.split()))
+    up_to = pd.Timestamp(up_to_date)
+
+    if period == 'last':
+        dfp = df_all[df_all['Date'] == up_to]
+    elif period == 'mtd':
+        dfp = df_all[(df_all['Date'].dt.month == up_to.month) &
+                     (df_all['Date'].dt.year == up_to.year) &
+                     (df_all['Date'] <= up_to)]
+    elif period == 'ytd':
+        dfp = df_all[(df_all['Date'].dt.year == up_to.year) &
+                     (df_all['Date'] <= up_to)]
+    else:
+        return pd.DataFrame()
+
+    if dfp.empty:
+        return pd.DataFrame()
+
+    grp = dfp.groupby('Hotel').agg({
+        'Room_Available': 'sum',
+        'Room_Sold': 'sum',
+        'ADR': lambda x: (x * dfp.loc[x.index, 'Room_Sold']).sum() / dfp.loc[x.index, 'Room_Sold'].sum() if dfp.loc[x.index, 'Room_Sold'].sum() > 0 else 0
+    }).reset_index()
+    grp['Revenue'] = grp['Room_Sold'] * grp['ADR']
+    return grp
+
+
+def random_frame(seed, zero_sold=False):
+    """Data acak bersih (satu baris per (Date, Hotel)), dengan malam & hotel yang bolong."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', '2025-12-31', freq='D')
+    hotels = [f'Hotel {i}' for i in range(rng.integers(2, 7))]
+    grid = pd.MultiIndex.from_product([dates, hotels], names=['Date', 'Hotel']).to_frame(index=False)
+    grid = grid[rng.random(len(grid)) < 0.8]
+    n = len(grid)
+    available = rng.integers(20, 200, n)
+    sold = np.zeros(n, dtype=int) if zero_sold else rng.integers(0, available + 1)
+    return data_store.clean_frame(grid.assign(
+        Room_Available=available,
+        Room_Sold=sold,
+        ADR=rng.uniform(300_000, 3_000_000, n).round(2),
+    ))
+
+
+def assert_same(result, expected, rtol=1e-12):
+    assert result.empty == expected.empty
+    if expected.empty:
+        return
+    result = result.assign(Hotel=result['Hotel'].astype(str)).sort_values('Hotel').reset_index(drop=True)
+    expected = expected.sort_values('Hotel').reset_index(drop=True)
+    assert result['Hotel'].tolist() == expected['Hotel'].tolist()
+    for c in ['Room_Available', 'Room_Sold']:
+        np.testing.assert_array_equal(result[c].to_numpy(dtype='int64'), expected[c].to_numpy(dtype='int64'))
+    for c in ['ADR', 'Revenue']:
+        np.testing.assert_allclose(result[c].to_numpy(dtype='float64'), expected[c].to_numpy(dtype='float64'), rtol=rtol)
+
+
+def _up_to_dates(df, seed):
+    rng = np.random.default_rng(seed)
+    present = df['Date'].drop_duplicates().sort_values()
+    picks = list(present.sample(5, random_state=seed))
+    # Juga tanggal tanpa data dan di luar rentang data
+    picks += [pd.Timestamp('2023-06-15'), pd.Timestamp('2026-02-01'), present.iloc[int(rng.integers(len(present)))]]
+    return picks
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('period', PERIODS)
+def test_aggregate_period_matches_reference(seed, period):
+    df = random_frame(seed)
+    for up_to in _up_to_dates(df, seed):
+        expected = reference_aggregate_period(df, up_to, period)
+        assert_same(metrics.aggregate_period(df, up_to, period), expected)
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('period', PERIODS)
+def test_cube_path_matches_reference(seed, period):
+    df = random_frame(seed)
+    cube = DailyCube(df)
+    for up_to in _up_to_dates(df, seed):
+        expected = reference_aggregate_period(df, up_to, period)
+        assert_same(metrics.aggregate_period(df, up_to, period, cube=cube), expected, rtol=CUBE_RTOL)
+
+
+@pytest.mark.parametrize('period', PERIODS)
+def test_all_zero_sold(period):
+    df = random_frame(99, zero_sold=True)
+    up_to = df['Date'].max()
+    expected = reference_aggregate_period(df, up_to, period)
+    for result in (metrics.aggregate_period(df, up_to, period),
+                   metrics.aggregate_period(df, up_to, period, cube=DailyCube(df))):
+        assert_same(result, expected, rtol=CUBE_RTOL)
+        assert (result['ADR'] == 0).all()
+        assert (result['Revenue'] == 0).all()
+
+
+def test_compute_all_periods_ignores_time_of_day():
+    df = random_frame(7)
+    day = df['Date'].max()
+    expected = metrics.compute_all_periods(df, day, cube=DailyCube(df))
+    result = metrics.compute_all_periods(df, day + pd.Timedelta(hours=15, minutes=30))
+    for name in expected:
+        assert not result[name].empty
+        pd.testing.assert_frame_equal(result[name].reset_index(drop=True), expected[name].reset_index(drop=True),
+                                      check_dtype=False, rtol=CUBE_RTOL)